@@ -0,0 +1,57 @@
+// Written by scripts/pack_writer.py: the files sw.js caches on install
+self.PRECACHE = {
+  "version": "6c127a46b0",
+  "files": [
+    "manifest.json",
+    "shards/europe-0.9989f80d31.bin",
+    "shards/europe-1.563d3ca6e7.bin",
+    "shards/europe-2.cc93c08137.bin",
+    "shards/europe-3.3521c765ec.bin",
+    "shards/europe-4.7730ada133.bin",
+    "shards/europe-5.d7d111489b.bin",
+    "shards/europe-6.606662f531.bin",
+    "shards/europe-7.d73b001f4a.bin",
+    "shards/europe-8.4efd42e202.bin",
+    "shards/europe-9.310ad01851.bin",
+    "shards/europe-10.a390b7b8c0.bin",
+    "shards/europe-11.9bc782050e.bin",
+    "shards/europe-12.124c278091.bin",
+    "shards/europe-13.6296d4d37b.bin",
+    "shards/europe-14.4c3f9795b7.bin",
+    "shards/latin-america-0.ece3693a2e.bin",
+    "shards/latin-america-1.c033ae87e9.bin",
+    "shards/latin-america-2.c511ea42b9.bin",
+    "shards/latin-america-3.73a035fc5f.bin",
+    "shards/latin-america-4.c0adc19b5e.bin",
+    "shards/latin-america-5.90a051b0b0.bin",
+    "shards/asia-0.73adf6b87c.bin",
+    "shards/asia-1.3fe10a24c2.bin",
+    "shards/asia-2.4a156d3437.bin",
+    "shards/asia-3.9dee2a963e.bin",
+    "shards/asia-4.63b731206a.bin",
+    "shards/asia-5.97a8566d2a.bin",
+    "shards/asia-6.e053e6b2bc.bin",
+    "shards/asia-7.0c956ab8e7.bin",
+    "shards/asia-8.e7ed7344fb.bin",
+    "shards/asia-9.91b6eaf716.bin",
+    "shards/asia-10.e13dc13474.bin",
+    "shards/africa-0.12a1074028.bin",
+    "shards/africa-1.7c3790b776.bin",
+    "shards/africa-2.246035c57e.bin",
+    "shards/africa-3.a6a22603b3.bin",
+    "shards/africa-4.914a6ead7a.bin",
+    "shards/africa-5.1c8739e778.bin",
+    "shards/africa-6.45da7c5b5f.bin",
+    "shards/africa-7.f0ca925cc7.bin",
+    "shards/north-america-0.5c6da59089.bin",
+    "shards/north-america-1.4fbd207b24.bin",
+    "shards/north-america-2.52f3e75d2f.bin",
+    "shards/north-america-3.76b53f88ef.bin",
+    "shards/north-america-4.4206b8c991.bin",
+    "shards/north-america-5.d0bb7b34a7.bin",
+    "shards/oceania-0.1df77ee930.bin",
+    "shards/oceania-1.8400ad5342.bin",
+    "shards/oceania-2.d6ca88d81b.bin",
+    "shards/unusual-0.7685269173.bin"
+  ]
+};
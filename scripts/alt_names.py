@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Localized place names from GeoNames alternateNamesV2.txt (or the .zip it
+ships in). The file is hundreds of MB but the build only needs names for
+the ~1,500 selected cities, so it is streamed once and joined on
+geonameid against a set of just those ids: each line is rejected on its
+language code and then its id before anything is decoded. Memory is
+O(selected cities × languages) whatever the size of the file.
+"""
+import os, time
+
+from build_cache import config_hash
+from geonames_io import iter_lines
+
+ALT_NAMES_FILE = "/tmp/alternateNamesV2.zip"
+ALT_NAMES_MEMBER = "alternateNamesV2.txt"
+LANGUAGES = ("es", "en")
+
+# alternateNamesV2 tab-separated columns (0-indexed)
+# 0:alternateNameId 1:geonameid 2:isolanguage 3:alternate name
+# 4:isPreferredName 5:isShortName 6:isColloquial 7:isHistoric 8:from 9:to
+COL_GID, COL_LANG, COL_NAME = 1, 2, 3
+COL_PREFERRED, COL_SHORT, COL_COLLOQUIAL, COL_HISTORIC = 4, 5, 6, 7
+
+def _rank(parts):
+    # Preferred names first; colloquial and historic ones last; short forms
+    # ("Frisco") only beat nothing
+    flag = lambda col: len(parts) > col and parts[col] == b"1"
+    return (flag(COL_PREFERRED), not flag(COL_COLLOQUIAL), not flag(COL_HISTORIC), not flag(COL_SHORT))
+
+def join_names(filepath, gids, languages=LANGUAGES, stats=None):
+    """{language: {geonameid: best name}} for the wanted ids only."""
+    wanted = {str(g).encode("ascii") for g in gids}
+    langs = {lang.encode("ascii") for lang in languages}
+    best = {}   # (gid bytes, lang bytes) -> (rank, name bytes)
+    rows = 0
+    for line in iter_lines(filepath, ALT_NAMES_MEMBER):
+        rows += 1
+        parts = line.split(b"\t", COL_HISTORIC + 1)
+        if len(parts) <= COL_NAME or parts[COL_LANG] not in langs or parts[COL_GID] not in wanted:
+            continue
+        key, rank = (parts[COL_GID], parts[COL_LANG]), _rank(parts)
+        if key not in best or rank > best[key][0]:
+            best[key] = (rank, parts[COL_NAME])
+    if stats is not None:
+        stats["rows"] = stats.get("rows", 0) + rows
+    names = {lang: {} for lang in languages}
+    for (gid, lang), (_, name) in best.items():
+        names[lang.decode("ascii")][int(gid)] = name.decode("utf-8", "replace")
+    return names
+
+def localized_labels(city, label, names):
+    """{language: label} with the city's name swapped for its localized one."""
+    suffix = label[len(city["name"]):] if label.startswith(city["name"]) else ""
+    out = {}
+    for lang, table in names.items():
+        name = table.get(city.get("gid"))
+        if name:
+            out[lang] = name + suffix
+    return out
+
+def add_alt_names_arguments(ap):
+    ap.add_argument("--alternate-names", default=ALT_NAMES_FILE, metavar="PATH",
+                    help="GeoNames alternateNamesV2 .txt/.zip for the per-language label tables "
+                         "(default: %(default)s; skipped if missing)")
+
+def load_alt_names(args, selected, cache, report=None):
+    """Localized names for the selected cities, cached by file hash and ids."""
+    path = args.alternate_names
+    if not path or not os.path.exists(path):
+        print(f"  ⚠️  {path} not found — no localized label tables")
+        return None
+    gids = sorted(c["gid"] for c in selected)
+    key = config_hash(cache.file_hash(path), gids, LANGUAGES)
+    names = None if args.no_cache else cache.get("altnames", key)
+    if names is not None:
+        return {lang: {int(g): n for g, n in table.items()} for lang, table in names.items()}
+    stats = {}
+    t0 = time.perf_counter()
+    names = join_names(path, gids, LANGUAGES, stats)
+    found = ", ".join(f"{len(t)} {lang}" for lang, t in names.items())
+    print(f"  🔤 Joined {stats['rows']:,} alternate names in {time.perf_counter() - t0:.1f}s ({found})")
+    if report is not None:
+        report.count("alternate_names", {"scanned": stats["rows"],
+                                         **{lang: len(t) for lang, t in names.items()}})
+    cache.put("altnames", key, names)
+    return names
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the location build, on synthetic GeoNames dumps (see
+synth_geonames.py), so they run offline and give comparable numbers on
+any machine. Every stage is timed (best of --repeat runs) and then run
+once more under tracemalloc for its peak allocation. Results go to a
+JSON file named after the current commit; --compare prints the change
+against an earlier results file.
+
+    python scripts/benchmark.py --sizes 10k,100k,1M,12M
+    python scripts/benchmark.py --compare .build-cache/benchmarks/<old>.json
+"""
+import argparse, contextlib, io, json, os, platform, random, subprocess
+import tempfile, time, tracemalloc
+
+import numpy as np
+
+import build_from_geonames as bfg
+from build_cache import CACHE_DIR, write_if_changed
+from city_db import CityDB
+from geonames_io import iter_cities
+from pack_writer import write_outputs
+from synth_geonames import SEED, parse_count, write_dump
+
+BENCH_DIR     = os.path.join(CACHE_DIR, "benchmarks")
+DUMP_DIR      = os.path.join(CACHE_DIR, "synthetic")
+DEFAULT_SIZES = "10k,100k,1M"
+SLOWER        = 1.10   # --compare flags stages that got this much slower
+
+def synthetic_dump(rows, seed=SEED):
+    """Path of a cached synthetic dump with `rows` rows, written on first use."""
+    os.makedirs(DUMP_DIR, exist_ok=True)
+    path = os.path.join(DUMP_DIR, f"geonames-{rows}-{seed}.txt")
+    if not os.path.exists(path):
+        t0 = time.perf_counter()
+        write_dump(path + ".tmp", rows, seed)
+        os.replace(path + ".tmp", path)
+        print(f"  🧪 generated {rows:,} rows in {time.perf_counter() - t0:.1f}s")
+    return path
+
+def measure(fn, repeat, memory=True):
+    """(result, best seconds, peak traced bytes or None) for a zero-argument call."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = fn()
+        best = min(best, time.perf_counter() - t0)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, best, peak
+
+def write_fresh(locations):
+    with tempfile.TemporaryDirectory() as out:
+        write_outputs(locations, out)
+
+def build_locations(selected):
+    random.seed(bfg.SEED)
+    return [bfg.build_location(c) for c in selected]
+
+def bench_size(rows, args):
+    path = synthetic_dump(rows, args.seed)
+    countries = {cc for cc in bfg.CONTINENT if cc not in bfg.LOW_COVERAGE}
+    stages = [("load_cities", lambda: bfg.load_cities(path))]
+    if args.workers != 1:
+        stages.append((f"load_cities_x{args.workers}", lambda: bfg.load_cities(path, workers=args.workers)))
+    results, cities = [], None
+    for name, fn in stages:
+        cities, seconds, peak = measure(fn, args.repeat, not args.no_memory)
+        results.append((name, seconds, peak, len(cities)))
+
+    # What a build pays instead of load_cities once the city database is written
+    with tempfile.TemporaryDirectory() as tmp:
+        db = CityDB(os.path.join(tmp, "cities.sqlite3"))
+        db.replace(cities, "benchmark")
+        stored, seconds, peak = measure(lambda: bfg.filter_cities(db.read()), args.repeat, not args.no_memory)
+        db.close()
+    results.append(("read_city_db", seconds, peak, len(stored)))
+
+    later = [
+        ("select_balanced",  lambda: bfg.select_balanced(cities, bfg.TARGETS)),
+        ("select_streaming", lambda: bfg.select_streaming(iter_cities(path, countries, bfg.MIN_POPULATION),
+                                                          bfg.TARGETS)[0]),
+    ]
+    selected = None
+    for name, fn in later:
+        selected, seconds, peak = measure(fn, args.repeat, not args.no_memory)
+        results.append((name, seconds, peak, len(selected)))
+
+    locations, seconds, peak = measure(lambda: build_locations(selected), args.repeat, not args.no_memory)
+    results.append(("build_location", seconds, peak, len(locations)))
+    _, seconds, peak = measure(lambda: write_fresh(locations), args.repeat, not args.no_memory)
+    results.append(("write_outputs", seconds, peak, len(locations)))
+    return [{"stage": name, "rows": rows, "seconds": round(seconds, 6), "peak_bytes": peak, "items": items}
+            for name, seconds, peak, items in results]
+
+def git_commit():
+    """(short HEAD, has uncommitted changes) or (None, None) outside a checkout."""
+    def git(*cmd):
+        return subprocess.run(["git", *cmd], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    try:
+        return git("rev-parse", "--short=12", "HEAD"), bool(git("status", "--porcelain", "--untracked-files=no"))
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+def compare(old_path, new):
+    with open(old_path, encoding="utf-8") as f:
+        old = {(r["stage"], r["rows"]): r for r in json.load(f)["results"]}
+    print(f"\n📊 vs {old_path}")
+    for r in new["results"]:
+        before = old.get((r["stage"], r["rows"]))
+        if not before or not before["seconds"]:
+            continue
+        ratio = r["seconds"] / before["seconds"]
+        mark = "  ▲ slower" if ratio > SLOWER else ("  ▼ faster" if ratio < 1 / SLOWER else "")
+        print(f"  {r['stage']:<20} {r['rows']:>12,}  {before['seconds']:9.3f}s → {r['seconds']:9.3f}s  ×{ratio:.2f}{mark}")
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the location build on synthetic dumps")
+    ap.add_argument("--sizes", default=DEFAULT_SIZES,
+                    help="comma-separated row counts, 10k … 12M (default: %(default)s)")
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs per stage, best is kept")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="also time the parallel loader with N processes (0 = one per CPU)")
+    ap.add_argument("--seed", type=int, default=SEED, help="synthetic dump seed")
+    ap.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    ap.add_argument("--out", help="results file (default: .build-cache/benchmarks/<commit>.json)")
+    ap.add_argument("--compare", metavar="JSON", help="earlier results file to compare against")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    commit, dirty = git_commit()
+    report = {
+        "commit": commit, "dirty": dirty,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(), "numpy": np.__version__,
+        "platform": platform.platform(), "cpus": os.cpu_count(),
+        "seed": args.seed, "repeat": args.repeat, "results": [],
+    }
+    for rows in (parse_count(s) for s in args.sizes.split(",")):
+        print(f"▶ {rows:,} rows")
+        for r in bench_size(rows, args):
+            peak = f"{r['peak_bytes'] / 2**20:8.1f} MB" if r["peak_bytes"] is not None else ""
+            print(f"  ⏱  {r['stage']:<20} {r['seconds']:9.3f}s {peak}  ({r['items']:,} items)")
+            report["results"].append(r)
+
+    out = args.out or os.path.join(BENCH_DIR, f"{commit or 'nogit'}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    write_if_changed(out, json.dumps(report, indent=2).encode("utf-8"))
+    print(f"\n✅ results → {out}")
+    if args.compare:
+        compare(args.compare, report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Incremental build support for the pack scripts.
+  - content hashes of inputs, remembered by (size, mtime) so a large
+    GeoNames dump is only re-hashed when it actually changes
+  - a keyed on-disk cache for intermediate results (e.g. the sampled cities)
+  - write_if_changed() so untouched pack files keep their bytes and mtime
+  - watch() to rebuild whenever an input file is saved
+"""
+import hashlib, json, os, subprocess, sys, time
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".build-cache")
+WATCH_INTERVAL = 0.2  # seconds between mtime polls
+
+class BuildCache:
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+        self.manifest.setdefault("files", {})
+
+    def file_hash(self, path):
+        st = os.stat(path)
+        known = self.manifest["files"].get(os.path.abspath(path))
+        if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+            return known["sha256"]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        self.manifest["files"][os.path.abspath(path)] = {
+            "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": h.hexdigest(),
+        }
+        return h.hexdigest()
+
+    def get(self, name, key):
+        path = os.path.join(self.dir, f"{name}-{key[:16]}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, name, key, value):
+        os.makedirs(self.dir, exist_ok=True)
+        # Drop older entries for the same stage
+        for old in os.listdir(self.dir):
+            if old.startswith(f"{name}-") and old.endswith(".json"):
+                os.remove(os.path.join(self.dir, old))
+        write_if_changed(os.path.join(self.dir, f"{name}-{key[:16]}.json"),
+                         json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def save(self):
+        os.makedirs(self.dir, exist_ok=True)
+        write_if_changed(self.manifest_path,
+                         json.dumps(self.manifest, indent=2, sort_keys=True).encode("utf-8"))
+
+def config_hash(*parts):
+    """Stable hash of JSON-serialisable config values (dicts, lists, numbers…)."""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=sorted)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def write_if_changed(path, data):
+    """Write bytes to path unless it already holds exactly them. Returns True if written."""
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+def watch(paths, argv):
+    """Re-run this script (without --watch) each time one of `paths` changes."""
+    def snapshot():
+        out = {}
+        for p in paths:
+            try:
+                out[p] = os.stat(p).st_mtime_ns
+            except OSError:
+                out[p] = None
+        return out
+
+    cmd = [sys.executable, os.path.abspath(sys.argv[0])] + [a for a in argv if a != "--watch"]
+    seen = None
+    print("👀 Watching " + ", ".join(os.path.basename(p) for p in paths) + " (Ctrl+C to stop)")
+    try:
+        while True:
+            now = snapshot()
+            if now != seen:
+                seen = now
+                t0 = time.perf_counter()
+                subprocess.run(cmd)
+                print(f"⏱  rebuilt in {time.perf_counter() - t0:.2f}s\n")
+            time.sleep(WATCH_INTERVAL)
+    except KeyboardInterrupt:
+        pass
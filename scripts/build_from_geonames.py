@@ -4,57 +4,40 @@ Build Street View location database from GeoNames cities15000.txt
 Target: ~450 globally balanced locations across 7 themed packs
 Avoids over-indexing on famous capitals; prefers variety.
 """
-import csv, json, os, random
-
+import argparse, json, os, random, sys, time
+
+import numpy as np
+
+from alt_names import add_alt_names_arguments, load_alt_names, localized_labels
+from build_cache import BuildCache, config_hash, watch
+from build_report import BuildReport, add_report_arguments, profiled
+from city_db import CITY_DB_PATH, CityDB
+from city_store import CityStore, load_parallel
+from countries import CONTINENT
+from coverage_probe import add_probe_arguments, probe_locations
+from difficulty import add_difficulty
+from geonames_index import indexed_lines, load_index
+from geonames_io import is_seekable_dump, iter_cities, parse_rows
+from nearby_features import add_feature_arguments, apply_nearby_words, load_features
+from pack_writer import add_output_arguments, write_outputs
+from reverse_geocode import add_geocode_arguments, geocode_locations
+from sampling import WEIGHT_EXPONENT, WeightedSampler
+from spatial import SpatialGrid, near_duplicates, print_duplicates
+
+# Plain .txt or a .zip/.gz/.bz2 archive (e.g. allCountries.zip)
 GEONAMES_FILE = "/tmp/cities1000.txt"
+MIN_POPULATION = 10000
+SEED = 42
+SPACING_OVERSAMPLE = 3
+DEDUP_KM = 1.0  # generated cities this close to a curated location (or each other) are dropped
+RESERVOIR_FORMAT = 1  # bump when the cached reservoir entries change shape
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
 
 # GeoNames tab-separated columns (0-indexed)
 # 0:id 1:name 2:asciiname 3:altnames 4:lat 5:lng 6:feat_class 7:feat_code
 # 8:country 9:cc2 10:admin1 11:admin2 12:admin3 13:admin4
 # 14:population 15:elevation 16:dem 17:timezone 18:modification_date
 
-# Country → continent mapping
-CONTINENT = {
-    # Europe
-    "AD":"EU","AL":"EU","AT":"EU","BA":"EU","BE":"EU","BG":"EU","BY":"EU",
-    "CH":"EU","CY":"EU","CZ":"EU","DE":"EU","DK":"EU","EE":"EU","ES":"EU",
-    "FI":"EU","FR":"EU","GB":"EU","GR":"EU","HR":"EU","HU":"EU","IE":"EU",
-    "IS":"EU","IT":"EU","LI":"EU","LT":"EU","LU":"EU","LV":"EU","MC":"EU",
-    "MD":"EU","ME":"EU","MK":"EU","MT":"EU","NL":"EU","NO":"EU","PL":"EU",
-    "PT":"EU","RO":"EU","RS":"EU","RU":"EU","SE":"EU","SI":"EU","SK":"EU",
-    "SM":"EU","UA":"EU","VA":"EU","XK":"EU","GE":"EU","AM":"EU","AZ":"EU",
-    # Asia
-    "AE":"AS","AF":"AS","BD":"AS","BH":"AS","BN":"AS","BT":"AS","CN":"AS",
-    "HK":"AS","ID":"AS","IL":"AS","IN":"AS","IQ":"AS","IR":"AS","JO":"AS",
-    "JP":"AS","KG":"AS","KH":"AS","KP":"AS","KR":"AS","KW":"AS","KZ":"AS",
-    "LA":"AS","LB":"AS","LK":"AS","MM":"AS","MN":"AS","MO":"AS","MV":"AS",
-    "MY":"AS","NP":"AS","OM":"AS","PH":"AS","PK":"AS","PS":"AS","QA":"AS",
-    "SA":"AS","SG":"AS","SY":"AS","TH":"AS","TJ":"AS","TL":"AS","TM":"AS",
-    "TR":"AS","TW":"AS","UZ":"AS","VN":"AS","YE":"AS",
-    # Africa
-    "AO":"AF","BF":"AF","BI":"AF","BJ":"AF","BW":"AF","CD":"AF","CF":"AF",
-    "CG":"AF","CI":"AF","CM":"AF","CV":"AF","DJ":"AF","DZ":"AF","EG":"AF",
-    "ER":"AF","ET":"AF","GA":"AF","GH":"AF","GM":"AF","GN":"AF","GQ":"AF",
-    "GW":"AF","KE":"AF","KM":"AF","LR":"AF","LS":"AF","LY":"AF","MA":"AF",
-    "MG":"AF","ML":"AF","MR":"AF","MU":"AF","MW":"AF","MZ":"AF","NA":"AF",
-    "NE":"AF","NG":"AF","RE":"AF","RW":"AF","SC":"AF","SD":"AF","SL":"AF",
-    "SN":"AF","SO":"AF","SS":"AF","ST":"AF","SZ":"AF","TD":"AF","TG":"AF",
-    "TN":"AF","TZ":"AF","UG":"AF","ZA":"AF","ZM":"AF","ZW":"AF","EH":"AF",
-    # North America
-    "AG":"NA","BB":"NA","BL":"NA","BS":"NA","BZ":"NA","CA":"NA","CR":"NA",
-    "CU":"NA","DM":"NA","DO":"NA","GD":"NA","GL":"NA","GT":"NA","HN":"NA",
-    "HT":"NA","JM":"NA","KN":"NA","LC":"NA","MF":"NA","MX":"NA","NI":"NA",
-    "PA":"NA","PM":"NA","PR":"NA","SV":"NA","TT":"NA","US":"NA","VC":"NA",
-    "VG":"NA","VI":"NA",
-    # South America
-    "AR":"SA","BO":"SA","BR":"SA","CL":"SA","CO":"SA","EC":"SA","FK":"SA",
-    "GF":"SA","GY":"SA","PE":"SA","PY":"SA","SR":"SA","UY":"SA","VE":"SA",
-    # Oceania
-    "AU":"OC","FJ":"OC","FM":"OC","GU":"OC","KI":"OC","MH":"OC","MP":"OC",
-    "NC":"OC","NR":"OC","NZ":"OC","PF":"OC","PG":"OC","PW":"OC","SB":"OC",
-    "TO":"OC","TV":"OC","VU":"OC","WF":"OC","WS":"OC",
-}
-
 # Continent targets (~1,400 from GeoNames + 193 curated = ~1,600 total)
 TARGETS = {
     "EU": 420,  # excellent Street View coverage
@@ -202,148 +185,344 @@ def get_pack_id(continent):
     }
     return mapping.get(continent, "unusual")
 
-def load_cities(filepath):
-    cities = []
-    with open(filepath, encoding="utf-8") as f:
-        for line in f:
-            parts = line.rstrip("\n").split("\t")
-            if len(parts) < 15:
-                continue
-            try:
-                name    = parts[1]
-                lat     = float(parts[4])
-                lng     = float(parts[5])
-                cc      = parts[8]
-                pop     = int(parts[14]) if parts[14] else 0
-                feat    = parts[7]
-            except (ValueError, IndexError):
-                continue
-
-            continent = get_continent(cc)
-            if not continent:
-                continue
-            if cc in LOW_COVERAGE:
-                continue
-            if pop < 10000:
-                continue
-
-            cities.append({
-                "name": name, "lat": lat, "lng": lng, "cc": cc,
-                "pop": pop, "feat": feat, "continent": continent,
-            })
-    return cities
-
-def select_balanced(cities, targets):
-    random.seed(42)
-
-    # Group by continent
-    by_continent = {}
-    for c in cities:
-        cont = c["continent"]
-        by_continent.setdefault(cont, []).append(c)
-
-    # Sort each continent group: shuffle within population tiers to avoid
-    # always picking the biggest city in each country
-    selected = []
-    for cont, target in targets.items():
-        pool = by_continent.get(cont, [])
-        if not pool:
+def iter_rows(filepath, countries=CONTINENT, stats=None):
+    # The reader drops other countries and small places on the raw bytes;
+    # with a per-country index (geonames_index.py) it only reads their rows
+    # Rows of countries that are known but not wanted this time are not "unknown"
+    lines = indexed_lines(filepath, countries, MIN_POPULATION)
+    if lines is None:
+        return iter_cities(filepath, countries, MIN_POPULATION, stats, CONTINENT)
+    if stats is not None:
+        stats["indexed"] = True
+    return parse_rows(lines, countries, MIN_POPULATION, stats, CONTINENT)
+
+def read_cities(filepath, stats=None, workers=1, countries=CONTINENT):
+    if workers != 1 and is_seekable_dump(filepath) and load_index(filepath, MIN_POPULATION) is None:
+        return load_parallel(filepath, countries, MIN_POPULATION, workers, stats)
+    if workers != 1 and not is_seekable_dump(filepath):
+        print("  (compressed input — parallel ingest needs a plain .txt, reading serially)")
+    return CityStore.from_rows(iter_rows(filepath, countries, stats))
+
+def filter_cities(store, stats=None):
+    # Continent, LOW_COVERAGE and population filters run column-wise
+    continent = store.country_lookup(CONTINENT, "")
+    low = store.country_mask(LOW_COVERAGE)
+    keep = (continent != "") & ~low & (store.pop >= MIN_POPULATION)
+    if stats is not None:
+        stats["low_coverage"] = stats.get("low_coverage", 0) + int(np.count_nonzero(low))
+    return store.take(np.flatnonzero(keep))
+
+def load_cities(filepath, stats=None, workers=1):
+    return filter_cities(read_cities(filepath, stats, workers), stats)
+
+def drop_low_coverage(rows, stats=None):
+    for row in rows:
+        if row[4] in LOW_COVERAGE:
+            if stats is not None:
+                stats["low_coverage"] = stats.get("low_coverage", 0) + 1
             continue
+        yield row
+
+def spacing_rule(min_sep_km, fixed_points=()):
+    # Optional minimum great-circle separation; fixed points (curated
+    # locations) block their surroundings before anything is picked
+    if min_sep_km <= 0:
+        return None
+    grid = SpatialGrid(min_sep_km)
+    for lat, lng in fixed_points:
+        grid.add(lat, lng)
+
+    def accept(lat, lng):
+        if grid.has_neighbour(lat, lng):
+            return False
+        grid.add(lat, lng)
+        return True
+    return accept
+
+def new_sampler(targets, min_sep_km, seed, caps=None, default_cap=None):
+    # Spacing rejects are refilled from spare per-country candidates
+    oversample = SPACING_OVERSAMPLE if min_sep_km > 0 else 1
+    return WeightedSampler(targets, CAP_COUNTRIES if caps is None else caps,
+                           DEFAULT_CAP if default_cap is None else default_cap, seed, oversample)
+
+def offer_cities(sampler, cities):
+    # One pass, population-weighted, capped per country
+    continent = cities.country_lookup(CONTINENT, "").tolist()
+    rows = zip(cities.gid.tolist(), cities.cc.tolist(), cities.pop.tolist())
+    for i, (gid, code, pop) in enumerate(rows):
+        sampler.offer(i, continent[i], cities.countries[code], pop, gid)
+
+def select_balanced(cities, targets, min_sep_km=0, fixed_points=(), seed=SEED, stats=None,
+                    caps=None, default_cap=None):
+    sampler = new_sampler(targets, min_sep_km, seed, caps, default_cap)
+    offer_cities(sampler, cities)
+
+    accept = spacing_rule(min_sep_km, fixed_points)
+    if accept is not None:
+        lat, lng = cities.lat, cities.lng
+        veto = lambda i: accept(float(lat[i]), float(lng[i]))
+    else:
+        veto = None
+
+    # Only the picked rows become dicts
+    selected = [cities.record(i, cont) for cont, i in sampler.sample(veto)]
+    if stats is not None:
+        stats.update(sampler.stats)
+    return selected
 
-        # Sort by population descending; take top 5x target as candidates
-        pool.sort(key=lambda x: x["pop"], reverse=True)
-        candidates = pool[:target * 5]
-        random.shuffle(candidates)
-
-        country_counts = {}
-        picked = []
-        for city in candidates:
-            cc = city["cc"]
-            cap = CAP_COUNTRIES.get(cc, DEFAULT_CAP)
-            if country_counts.get(cc, 0) >= cap:
-                continue
-            country_counts[cc] = country_counts.get(cc, 0) + 1
-            picked.append(city)
-            if len(picked) >= target:
-                break
-
-        selected.extend(picked)
-
+def select_streaming(rows, targets, min_sep_km=0, fixed_points=(), seed=SEED, stats=None):
+    # Same sampler fed straight from the reader: only the reservoirs are
+    # held in memory, never the full list of eligible cities
+    sampler = new_sampler(targets, min_sep_km, seed)
+    count = 0
+    for row in rows:
+        cc = row[4]
+        sampler.offer(row, CONTINENT[cc], cc, row[5], row[0])
+        count += 1
+
+    accept = spacing_rule(min_sep_km, fixed_points)
+    veto = (lambda row: accept(row[2], row[3])) if accept is not None else None
+    selected = [row_record(row, cont) for cont, row in sampler.sample(veto)]
+    if stats is not None:
+        stats.update(sampler.stats)
+    return selected, count
+
+def select_reservoirs(reservoirs, targets, min_sep_km=0, fixed_points=(), seed=SEED, stats=None):
+    # Same selection as select_balanced, from saved per-country reservoirs
+    sampler = new_sampler(targets, min_sep_km, seed)
+    for cc, entries in reservoirs.items():
+        sampler.restore(CONTINENT[cc], cc, entries)
+    accept = spacing_rule(min_sep_km, fixed_points)
+    veto = (lambda city: accept(city["lat"], city["lng"])) if accept is not None else None
+    selected = [city for _, city in sampler.sample(veto)]
+    if stats is not None:
+        stats.update(sampler.stats)
     return selected
 
-def build_location(city):
+def row_record(row, continent):
+    gid, name, lat, lng, cc, pop, feat = row
+    return {
+        "gid": gid, "name": name, "lat": lat, "lng": lng, "cc": cc,
+        "pop": pop, "feat": feat, "continent": continent,
+    }
+
+def build_location(city, names=None):
     cont = city["continent"]
     flag = get_flag(city["cc"])
     pack = get_pack_id(cont)
     words = get_words(cont, city.get("feat", "PPL"))
-    return {
+    loc = {
         "lat": round(city["lat"], 4),
         "lng": round(city["lng"], 4),
         "label": f"{city['name']}, {city['cc']} {flag}",
+        "cc": city["cc"],
+        "gid": city["gid"],
         "pack": pack,
         "words": words,
     }
+    if names:
+        loc["labels"] = localized_labels(city, loc["label"], names)
+    return loc
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Build location packs from a GeoNames dump")
+    ap.add_argument("--input", default=GEONAMES_FILE,
+                    help="GeoNames dump: .txt, .zip, .gz or .bz2 (default: %(default)s)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="parse an uncompressed dump in N processes (0 = one per CPU)")
+    ap.add_argument("--data-dir", default=DATA_DIR,
+                    help="where locations_curated.json is read and packs are written (default: %(default)s)")
+    ap.add_argument("--stream", action="store_true",
+                    help="sample straight from the streamed dump without loading every city")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="ignore cached intermediate results and re-read the dump")
+    ap.add_argument("--city-db", default=CITY_DB_PATH, metavar="SQLITE",
+                    help="parse-once store of the dump's cities (default: %(default)s)")
+    ap.add_argument("--watch", action="store_true",
+                    help="rebuild whenever the curated locations, this script or the dump change")
+    ap.add_argument("--min-separation", type=float, default=0, metavar="KM",
+                    help="minimum great-circle distance between any two locations (default: off)")
+    ap.add_argument("--dedup-km", type=float, default=DEDUP_KM, metavar="KM",
+                    help="drop generated locations this close to a curated or earlier one (default: %(default)s)")
+    add_probe_arguments(ap)
+    add_geocode_arguments(ap)
+    add_alt_names_arguments(ap)
+    add_feature_arguments(ap)
+    add_report_arguments(ap)
+    add_output_arguments(ap)
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.watch:
+        watch([args.input, os.path.join(args.data_dir, "locations_curated.json"),
+               os.path.abspath(__file__)], sys.argv[1:] if argv is None else argv)
+        return
+
+    report = BuildReport(args.trace_memory)
+    with profiled(args.profile):
+        summary = build(args, report)
+    path = report.save(args.report, input=args.input, stream=args.stream, workers=args.workers,
+                       min_separation=args.min_separation, **summary)
+    report.summary()
+    print(f"  📝 build report → {path}")
+
+def load_curated(data_dir):
+    manual_path = os.path.join(data_dir, "locations_curated.json")
+    if not os.path.exists(manual_path):
+        return []
+    with open(manual_path) as f:
+        return json.load(f)
 
-def main():
-    print("Loading GeoNames data…")
-    cities = load_cities(GEONAMES_FILE)
-    print(f"  Loaded {len(cities):,} eligible cities")
-
-    selected = select_balanced(cities, TARGETS)
-    print(f"  Selected {len(selected)} cities")
-
-    locations = [build_location(c) for c in selected]
-    random.shuffle(locations)
-
-    base      = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    data_dir  = os.path.join(base, "data")
-    packs_dir = os.path.join(data_dir, "packs")
-    os.makedirs(packs_dir, exist_ok=True)
+def build(args, report):
+    data_dir = args.data_dir
 
     # --- Merge with handcrafted locations (keep the good manual ones) ---
-    manual_path = os.path.join(data_dir, "locations_curated.json")
-    manual = []
-    if os.path.exists(manual_path):
-        with open(manual_path) as f:
-            manual = json.load(f)
+    manual = load_curated(data_dir)
+    fixed = [(loc["lat"], loc["lng"]) for loc in manual]
+
+    # Per-country reservoirs are cached; only countries whose inputs changed are resampled
+    cache = BuildCache()
+    reservoirs = load_reservoirs(args, cache, report)
+    selected = select_cities(reservoirs, fixed, args, report)
+    with report.stage("names"):
+        names = load_alt_names(args, selected, cache, report)
+    if manual:
         print(f"  Merging {len(manual)} curated locations")
 
-    all_locs = manual + locations
-
-    # Master file (no pack key)
-    master = [{k: v for k, v in loc.items() if k != "pack"} for loc in all_locs]
-    master_path = os.path.join(data_dir, "locations.json")
-    with open(master_path, "w", encoding="utf-8") as f:
-        json.dump(master, f, ensure_ascii=False, indent=2)
-    print(f"\n✅ locations.json — {len(master)} total locations")
-
-    # Pack files
-    pack_labels = {
-        "europe":        "🌍 Europe",
-        "latin-america": "🌎 Latin America",
-        "asia":          "🌏 Asia & Middle East",
-        "africa":        "🌍 Africa",
-        "north-america": "🌎 North America",
-        "oceania":       "🌏 Oceania & Pacific",
-        "unusual":       "🗺️ Unusual Places",
-    }
-    packs = {}
-    for loc in all_locs:
-        p = loc.get("pack", "unusual")
-        packs.setdefault(p, []).append({k: v for k, v in loc.items() if k != "pack"})
-
-    for pack_key, locs in packs.items():
-        pack_data = {
-            "id":        pack_key,
-            "label":     pack_labels.get(pack_key, pack_key.title()),
-            "locations": locs,
-        }
-        pack_path = os.path.join(packs_dir, f"{pack_key}.json")
-        with open(pack_path, "w", encoding="utf-8") as f:
-            json.dump(pack_data, f, ensure_ascii=False, indent=2)
-        print(f"  📦 {pack_key}.json — {len(locs)} locations")
+    with report.stage("merge"):
+        random.seed(SEED)
+        locations = [build_location(c, names) for c in selected]
+        # Curated entries win; the rest keep selection order (best key first)
+        locations, dropped = near_duplicates(locations, args.dedup_km, manual)
+        random.shuffle(locations)
+        all_locs = manual + locations
+    print_duplicates(dropped, args.dedup_km)
+    report.count("rejected", {"duplicate": len(dropped)})
+    with report.stage("features"):
+        features = load_features(args, cache, report)
+        if features is not None:
+            n = apply_nearby_words(locations, features, args.nearby_km)
+            print(f"  🏷  {n} of {len(locations)} generated locations got words from nearby features")
+    cache.save()
+    if args.probe_coverage:
+        with report.stage("probe"):
+            all_locs = probe_locations(all_locs, args)
+    with report.stage("geocode"):
+        all_locs = geocode_locations(all_locs, args)
+    with report.stage("difficulty"):
+        all_locs = add_difficulty(all_locs)
+    with report.stage("write"):
+        packs = write_outputs(all_locs, data_dir, args.ndjson)
+    report.pack_sizes(data_dir, packs)
 
     print(f"\n🌐 Grand total: {len(all_locs)} locations across {len(packs)} packs")
+    return {"cached": "parse" not in {s["stage"] for s in report.stages},
+            "selected": len(selected), "duplicates": len(dropped), "curated": len(manual), "locations": len(all_locs)}
+
+def reservoir_keys(args, file_hash):
+    # A country's reservoir only depends on its own rows and settings, so
+    # editing one CAP_COUNTRIES entry only resamples that country
+    oversample = SPACING_OVERSAMPLE if args.min_separation > 0 else 1
+    return {
+        cc: config_hash(RESERVOIR_FORMAT, file_hash, cc, cont, CAP_COUNTRIES.get(cc, DEFAULT_CAP) * oversample,
+                        SEED, MIN_POPULATION, WEIGHT_EXPONENT, args.stream)
+        for cc, cont in CONTINENT.items() if cc not in LOW_COVERAGE
+    }
+
+def load_reservoirs(args, cache, report):
+    file_hash = cache.file_hash(args.input)
+    keys = reservoir_keys(args, file_hash)
+    cached = {} if args.no_cache else cache.get("reservoirs", "countries") or {}
+    reservoirs = {cc: cached[cc]["entries"] for cc, key in keys.items()
+                  if cc in cached and cached[cc]["key"] == key}
+    stale = sorted(set(keys) - set(reservoirs))
+    if not stale:
+        print(f"Reusing cached reservoirs for all {len(keys)} countries (inputs unchanged)")
+        return reservoirs
+    if reservoirs:
+        shown = ", ".join(stale[:12]) + ("…" if len(stale) > 12 else "")
+        print(f"Reusing cached reservoirs for {len(reservoirs)} countries, resampling {len(stale)} ({shown})")
+    reservoirs.update(fill_reservoirs(args, stale, file_hash, report))
+    cache.put("reservoirs", "countries", {cc: {"key": keys[cc], "entries": reservoirs[cc]} for cc in keys})
+    return reservoirs
+
+def stored_cities(args, countries, file_hash, stats, report):
+    # The city database is only rewritten when the dump or MIN_POPULATION
+    # changed; then every country is parsed once so later builds can skip the dump
+    source = config_hash(file_hash, MIN_POPULATION)
+    db = CityDB(args.city_db)
+    try:
+        if not args.no_cache and db.is_current(source):
+            with report.stage("city_db"):
+                stats["city_db"] = True
+                return db.read(countries)
+        print(f"Loading GeoNames data from {args.input}…")
+        with report.stage("parse"):
+            store = read_cities(args.input, stats, args.workers)
+        with report.stage("city_db"):
+            db.replace(store, source)
+        return store.take(np.flatnonzero(store.country_mask(countries)))
+    finally:
+        db.close()
+
+def fill_reservoirs(args, countries, file_hash, report):
+    """Sample the reservoirs of `countries`: {cc: [(key, gid, city), …]}."""
+    stats = {}
+    # LOW_COVERAGE rows are read too, so they are counted as such rather than as unknown
+    accept = set(countries) | LOW_COVERAGE
+    oversample = SPACING_OVERSAMPLE if args.min_separation > 0 else 1
+    sampler = WeightedSampler(dict.fromkeys(CONTINENT.values()), CAP_COUNTRIES, DEFAULT_CAP, SEED, oversample)
+    t0 = time.perf_counter()
+    if args.stream:
+        # One pass: parsing, filtering and the reservoirs are interleaved
+        print(f"Loading GeoNames data from {args.input}…")
+        with report.stage("parse"):
+            for row in drop_low_coverage(iter_rows(args.input, accept, stats), stats):
+                sampler.offer(row, CONTINENT[row[4]], row[4], row[5], row[0])
+            reservoirs = sampler.reservoirs(row_record)
+        eligible = sampler.stats["offered"]
+    else:
+        store = stored_cities(args, accept, file_hash, stats, report)
+        with report.stage("filter"):
+            cities = filter_cities(store, stats)
+            del store
+        eligible = len(cities)
+        with report.stage("offer"):
+            offer_cities(sampler, cities)
+            reservoirs = sampler.reservoirs(cities.record)
+    elapsed = time.perf_counter() - t0
+    rate = stats.get("rows", 0) / elapsed if elapsed > 0 else 0
+    if stats.get("city_db"):
+        print(f"  Read {len(countries)} countries from {args.city_db} in {elapsed:.2f}s")
+    else:
+        print(f"  Scanned {stats.get('rows', 0):,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)"
+              + (" via the per-country index" if stats.get("indexed") else ""))
+    print(f"  Loaded {eligible:,} eligible cities")
+
+    report.count("rows", {"scanned": stats.get("rows", 0), "eligible": eligible,
+                          "offered": sampler.stats["offered"]})
+    report.count("rejected", {
+        "malformed":         stats.get("malformed", 0),
+        "unknown_continent": stats.get("country", 0),
+        "not_requested":     stats.get("not_requested", 0),
+        "population":        stats.get("population", 0),
+        "low_coverage":      stats.get("low_coverage", 0),
+        "country_cap":       sampler.stats["country_cap"],
+    })
+    return {cc: reservoirs.get(cc, []) for cc in countries}
+
+def select_cities(reservoirs, fixed, args, report):
+    picks = {}
+    with report.stage("select"):
+        selected = select_reservoirs(reservoirs, TARGETS, args.min_separation, fixed, stats=picks)
+    print(f"  Selected {len(selected)} cities")
+    if args.min_separation > 0:
+        print(f"  (at least {args.min_separation:g} km apart, curated locations included)")
+    report.count("rows", {"selected": len(selected)})
+    report.count("rejected", {k: picks[k] for k in ("country_cap", "spacing", "continent_target")})
+    return selected
 
 if __name__ == "__main__":
     main()
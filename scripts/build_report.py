@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Build instrumentation: per-stage wall time and memory, reject counters
+and output sizes, written as one JSON report per build.
+Peak RSS is always recorded; it is this process's high-water mark, so it
+only grows from stage to stage and leaves out --workers children.
+--trace-memory also records each stage's own peak Python/numpy
+allocation with tracemalloc, at some cost in speed.
+"""
+import cProfile, glob, json, os, time, tracemalloc
+from contextlib import contextmanager
+
+from build_cache import CACHE_DIR, write_if_changed
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPORT_PATH = os.path.join(CACHE_DIR, "build-report.json")
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024  # Linux reports KiB
+
+class BuildReport:
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages   = []
+        self.counters = {}
+        self.packs    = {}
+        self.started  = time.perf_counter()
+        if trace_memory:
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        entry = {"stage": name}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] = round(time.perf_counter() - t0, 4)
+            if self.trace_memory:
+                entry["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+            entry["peak_rss_bytes"] = peak_rss_bytes()
+            self.stages.append(entry)
+
+    def count(self, group, counts):
+        """Add counts (e.g. rejects by reason) under a group name."""
+        bucket = self.counters.setdefault(group, {})
+        for key, n in counts.items():
+            bucket[key] = bucket.get(key, 0) + n
+
+    def pack_sizes(self, data_dir, pack_keys):
+        """Bytes on disk per pack: the pack files and its shards."""
+        for key in pack_keys:
+            files = glob.glob(os.path.join(data_dir, "packs", f"{key}.*"))
+            shards = glob.glob(os.path.join(data_dir, "shards", f"{key}-*.*"))
+            self.packs[key] = {
+                "pack_bytes":  sum(os.path.getsize(f) for f in files),
+                "shard_bytes": sum(os.path.getsize(f) for f in shards),
+                "shards":      sum(1 for f in shards if f.endswith(".json")),
+            }
+
+    def save(self, path=REPORT_PATH, **extra):
+        if self.trace_memory:
+            tracemalloc.stop()
+        report = {
+            "created":        time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "total_seconds":  round(time.perf_counter() - self.started, 4),
+            **extra,
+            "stages":         self.stages,
+            "counters":       self.counters,
+            "packs":          self.packs,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        write_if_changed(path, json.dumps(report, indent=2, ensure_ascii=False).encode("utf-8"))
+        return path
+
+    def summary(self):
+        for s in self.stages:
+            rss = s["peak_rss_bytes"]
+            mem = f", peak {s['peak_traced_bytes'] / 2**20:.1f} MB traced" if "peak_traced_bytes" in s else ""
+            rss = f", RSS {rss / 2**20:.0f} MB" if rss else ""
+            print(f"  ⏱  {s['stage']:<10} {s['seconds']:8.2f}s{mem}{rss}")
+
+def add_report_arguments(ap):
+    ap.add_argument("--report", default=REPORT_PATH, metavar="JSON",
+                    help="where to write the build report (default: %(default)s)")
+    ap.add_argument("--trace-memory", action="store_true",
+                    help="record each stage's peak allocation with tracemalloc (slower)")
+    ap.add_argument("--profile", metavar="PROF",
+                    help="also write cProfile stats for the whole build (view with python -m pstats)")
+
+@contextmanager
+def profiled(path):
+    """Run the block under cProfile and dump the stats to path (no-op if path is None)."""
+    if not path:
+        yield
+        return
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        prof.dump_stats(path)
+        print(f"  🔬 profile → {path}")
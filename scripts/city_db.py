@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Parse-once SQLite store of the GeoNames cities the build can use.
+The first build after the dump (or MIN_POPULATION) changes writes every
+parsed city to .build-cache/cities.sqlite3, indexed on country,
+continent and population. Later builds (new TARGETS, a cap change)
+then read just the countries they need from it, without going back to
+the dump. Rows keep file order, so a store read back from the database
+is the same one the parser produced.
+
+    sqlite3 .build-cache/cities.sqlite3 "SELECT continent, COUNT(*) FROM cities GROUP BY 1"
+"""
+import os, sqlite3
+
+from build_cache import CACHE_DIR
+from city_store import CityStore
+from countries import CONTINENT
+
+CITY_DB_PATH   = os.path.join(CACHE_DIR, "cities.sqlite3")
+CITY_DB_FORMAT = 1   # bump when the table layout changes
+
+class CityDB:
+    def __init__(self, path=CITY_DB_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.db   = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def source(self):
+        """The key the cities were written under (see replace), or None."""
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        return row and row[0]
+
+    def is_current(self, source):
+        return self.source() == f"{CITY_DB_FORMAT}:{source}"
+
+    def replace(self, store, source):
+        """Swap the table for the cities in `store`, in one transaction."""
+        continent = store.country_lookup(CONTINENT, "").tolist()
+        rows = zip(store.gid.tolist(), (store.name(i) for i in range(len(store))),
+                   store.lat.tolist(), store.lng.tolist(),
+                   (store.countries[c] for c in store.cc.tolist()), continent,
+                   store.pop.tolist(), (store.feats[f] for f in store.feat.tolist()))
+        with self.db:
+            self.db.execute("DROP TABLE IF EXISTS cities")
+            self.db.execute("""
+                CREATE TABLE cities (
+                    gid INTEGER, name TEXT, lat REAL, lng REAL,
+                    cc TEXT, continent TEXT, pop INTEGER, feat TEXT)""")
+            self.db.executemany("INSERT INTO cities VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.db.execute("CREATE INDEX cities_cc ON cities (cc)")
+            self.db.execute("CREATE INDEX cities_continent ON cities (continent, pop)")
+            self.db.execute("CREATE INDEX cities_pop ON cities (pop)")
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('source', ?)", (f"{CITY_DB_FORMAT}:{source}",))
+
+    def read(self, countries=None, min_pop=0):
+        """CityStore of the stored cities (optionally only `countries`), in file order."""
+        sql = "SELECT gid, name, lat, lng, cc, pop, feat FROM cities WHERE pop >= ?"
+        params = [min_pop]
+        if countries is not None:
+            countries = sorted(countries)
+            sql += f" AND cc IN ({', '.join('?' * len(countries))})"
+            params += countries
+        return CityStore.from_rows(self.db.execute(sql + " ORDER BY rowid", params))
+
+    def close(self):
+        self.db.close()
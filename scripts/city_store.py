@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Columnar city store for the GeoNames build (requires numpy).
+One typed array per column instead of one dict per city:
+float32 lat/lng, int64 population, dictionary-encoded country and
+feature codes, and names packed into a single UTF-8 blob.
+Rows are only turned back into dicts by `record()` for the few cities
+that actually get picked.
+"""
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from geonames_io import byte_ranges, iter_range_lines, parse_rows
+
+class CityStore:
+    def __init__(self, gid, lat, lng, pop, cc, feat, countries, feats, names, name_offsets):
+        self.gid       = gid          # int32 geonameid
+        self.lat       = lat          # float32
+        self.lng       = lng          # float32
+        self.pop       = pop          # int64
+        self.cc        = cc           # uint16 index into self.countries
+        self.feat      = feat         # uint16 index into self.feats
+        self.countries = countries    # list of ISO codes
+        self.feats     = feats        # list of feature codes
+        self._names    = names        # bytes, UTF-8
+        self._name_off = name_offsets # int64, len(self) + 1
+
+    def __len__(self):
+        return len(self.gid)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (geonameid, name, lat, lng, cc, pop, feat) tuples."""
+        gid, lat, lng, pop = array("q"), array("f"), array("f"), array("q")
+        cc, feat, name_off = array("H"), array("H"), array("q", [0])
+        names = bytearray()
+        cc_ids, feat_ids = {}, {}
+        for g, name, la, ln, c, p, f in rows:
+            gid.append(g)
+            lat.append(la)
+            lng.append(ln)
+            pop.append(p)
+            cc.append(cc_ids.setdefault(c, len(cc_ids)))
+            feat.append(feat_ids.setdefault(f, len(feat_ids)))
+            names += name.encode("utf-8")
+            name_off.append(len(names))
+        return cls(
+            np.frombuffer(gid, dtype=np.int64).astype(np.int32),
+            np.frombuffer(lat, dtype=np.float32),
+            np.frombuffer(lng, dtype=np.float32),
+            np.frombuffer(pop, dtype=np.int64),
+            np.frombuffer(cc, dtype=np.uint16),
+            np.frombuffer(feat, dtype=np.uint16),
+            list(cc_ids), list(feat_ids), bytes(names),
+            np.frombuffer(name_off, dtype=np.int64),
+        )
+
+    @classmethod
+    def concat(cls, stores):
+        """Stack stores end to end, re-encoding their country/feature codes."""
+        countries, feats = {}, {}
+        cc, feat = [], []
+        for s in stores:
+            cc_map = np.array([countries.setdefault(c, len(countries)) for c in s.countries] or [0], dtype=np.uint16)
+            ft_map = np.array([feats.setdefault(f, len(feats)) for f in s.feats] or [0], dtype=np.uint16)
+            cc.append(cc_map[s.cc])
+            feat.append(ft_map[s.feat])
+        offsets, base = [np.zeros(1, dtype=np.int64)], 0
+        for s in stores:
+            offsets.append(s._name_off[1:] + base)
+            base += int(s._name_off[-1])
+        return cls(
+            np.concatenate([s.gid for s in stores]),
+            np.concatenate([s.lat for s in stores]),
+            np.concatenate([s.lng for s in stores]),
+            np.concatenate([s.pop for s in stores]),
+            np.concatenate(cc), np.concatenate(feat),
+            list(countries), list(feats),
+            b"".join(s._names for s in stores), np.concatenate(offsets),
+        )
+
+    def take(self, idx):
+        """New store holding only rows `idx`, in that order."""
+        idx = np.asarray(idx, dtype=np.int64)
+        starts = self._name_off[idx]
+        lens   = self._name_off[idx + 1] - starts
+        offsets = np.zeros(len(idx) + 1, dtype=np.int64)
+        np.cumsum(lens, out=offsets[1:])
+        blob = np.frombuffer(self._names, dtype=np.uint8)
+        pos  = np.repeat(starts - offsets[:-1], lens) + np.arange(offsets[-1])
+        return CityStore(
+            self.gid[idx], self.lat[idx], self.lng[idx], self.pop[idx],
+            self.cc[idx], self.feat[idx], self.countries, self.feats,
+            blob[pos].tobytes(), offsets,
+        )
+
+    def name(self, i):
+        return self._names[self._name_off[i]:self._name_off[i + 1]].decode("utf-8")
+
+    def country_lookup(self, mapping, default):
+        """Per-row array of mapping[country], computed once per distinct code."""
+        table = np.array([mapping.get(c, default) for c in self.countries] or [default])
+        return table[self.cc]
+
+    def country_mask(self, codes):
+        table = np.array([c in codes for c in self.countries] or [False])
+        return table[self.cc]
+
+    def record(self, i, continent):
+        return {
+            "gid": int(self.gid[i]), "name": self.name(i), "lat": float(self.lat[i]), "lng": float(self.lng[i]),
+            "cc": self.countries[self.cc[i]], "pop": int(self.pop[i]),
+            "feat": self.feats[self.feat[i]], "continent": continent,
+        }
+
+def _load_range(job):
+    filepath, start, end, countries, min_pop = job
+    stats = {}
+    rows = parse_rows(iter_range_lines(filepath, start, end), countries, min_pop, stats)
+    return CityStore.from_rows(rows), stats
+
+def load_parallel(filepath, countries, min_pop, workers=None, stats=None):
+    """
+    Parse an uncompressed dump in newline-aligned byte ranges across a
+    process pool. Ranges are merged in file order, so the result is
+    row-for-row the same as the serial reader.
+    """
+    workers = workers or os.cpu_count() or 1
+    countries = set(countries)
+    jobs = [(filepath, a, b, countries, min_pop) for a, b in byte_ranges(filepath, workers * 4)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_load_range, jobs))
+    if stats is not None:
+        for _, part in results:
+            for k, v in part.items():
+                stats[k] = stats.get(k, 0) + v
+    return CityStore.concat([store for store, _ in results])
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Country tables shared by the build scripts, and the flag emoji helpers
+used to read and write the flags in location labels.
+"""
+import re
+
+# Country → continent mapping
+CONTINENT = {
+    # Europe
+    "AD":"EU","AL":"EU","AT":"EU","BA":"EU","BE":"EU","BG":"EU","BY":"EU",
+    "CH":"EU","CY":"EU","CZ":"EU","DE":"EU","DK":"EU","EE":"EU","ES":"EU",
+    "FI":"EU","FR":"EU","GB":"EU","GR":"EU","HR":"EU","HU":"EU","IE":"EU",
+    "IS":"EU","IT":"EU","LI":"EU","LT":"EU","LU":"EU","LV":"EU","MC":"EU",
+    "MD":"EU","ME":"EU","MK":"EU","MT":"EU","NL":"EU","NO":"EU","PL":"EU",
+    "PT":"EU","RO":"EU","RS":"EU","RU":"EU","SE":"EU","SI":"EU","SK":"EU",
+    "SM":"EU","UA":"EU","VA":"EU","XK":"EU","GE":"EU","AM":"EU","AZ":"EU",
+    # Asia
+    "AE":"AS","AF":"AS","BD":"AS","BH":"AS","BN":"AS","BT":"AS","CN":"AS",
+    "HK":"AS","ID":"AS","IL":"AS","IN":"AS","IQ":"AS","IR":"AS","JO":"AS",
+    "JP":"AS","KG":"AS","KH":"AS","KP":"AS","KR":"AS","KW":"AS","KZ":"AS",
+    "LA":"AS","LB":"AS","LK":"AS","MM":"AS","MN":"AS","MO":"AS","MV":"AS",
+    "MY":"AS","NP":"AS","OM":"AS","PH":"AS","PK":"AS","PS":"AS","QA":"AS",
+    "SA":"AS","SG":"AS","SY":"AS","TH":"AS","TJ":"AS","TL":"AS","TM":"AS",
+    "TR":"AS","TW":"AS","UZ":"AS","VN":"AS","YE":"AS",
+    # Africa
+    "AO":"AF","BF":"AF","BI":"AF","BJ":"AF","BW":"AF","CD":"AF","CF":"AF",
+    "CG":"AF","CI":"AF","CM":"AF","CV":"AF","DJ":"AF","DZ":"AF","EG":"AF",
+    "ER":"AF","ET":"AF","GA":"AF","GH":"AF","GM":"AF","GN":"AF","GQ":"AF",
+    "GW":"AF","KE":"AF","KM":"AF","LR":"AF","LS":"AF","LY":"AF","MA":"AF",
+    "MG":"AF","ML":"AF","MR":"AF","MU":"AF","MW":"AF","MZ":"AF","NA":"AF",
+    "NE":"AF","NG":"AF","RE":"AF","RW":"AF","SC":"AF","SD":"AF","SL":"AF",
+    "SN":"AF","SO":"AF","SS":"AF","ST":"AF","SZ":"AF","TD":"AF","TG":"AF",
+    "TN":"AF","TZ":"AF","UG":"AF","ZA":"AF","ZM":"AF","ZW":"AF","EH":"AF",
+    # North America
+    "AG":"NA","BB":"NA","BL":"NA","BS":"NA","BZ":"NA","CA":"NA","CR":"NA",
+    "CU":"NA","DM":"NA","DO":"NA","GD":"NA","GL":"NA","GT":"NA","HN":"NA",
+    "HT":"NA","JM":"NA","KN":"NA","LC":"NA","MF":"NA","MX":"NA","NI":"NA",
+    "PA":"NA","PM":"NA","PR":"NA","SV":"NA","TT":"NA","US":"NA","VC":"NA",
+    "VG":"NA","VI":"NA",
+    # South America
+    "AR":"SA","BO":"SA","BR":"SA","CL":"SA","CO":"SA","EC":"SA","FK":"SA",
+    "GF":"SA","GY":"SA","PE":"SA","PY":"SA","SR":"SA","UY":"SA","VE":"SA",
+    # Oceania
+    "AU":"OC","FJ":"OC","FM":"OC","GU":"OC","KI":"OC","MH":"OC","MP":"OC",
+    "NC":"OC","NR":"OC","NZ":"OC","PF":"OC","PG":"OC","PW":"OC","SB":"OC",
+    "TO":"OC","TV":"OC","VU":"OC","WF":"OC","WS":"OC",
+}
+
+# Places curated locations visit but the GeoNames sampling leaves out
+# (not in CONTINENT, so no cities are drawn from them); hints only
+HINT_CONTINENT = {"AQ": "AN", "SJ": "EU"}
+
+# A flag emoji is the country code spelled in regional indicator symbols
+_RI_BASE = 0x1F1E6
+FLAG_RE  = re.compile("[\U0001F1E6-\U0001F1FF]{2}")
+
+def flag_emoji(cc):
+    return "".join(chr(_RI_BASE + ord(c) - ord("A")) for c in cc.upper())
+
+def label_country(label):
+    """Country code of the first flag emoji in a label, or None."""
+    m = FLAG_RE.search(label)
+    return m and "".join(chr(ord(c) - _RI_BASE + ord("A")) for c in m.group())
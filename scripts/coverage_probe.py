@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Street View coverage probe for the pack build.
+Asks a metadata endpoint (by default the free Street View Static API
+metadata call) whether there is a panorama near every location, many
+requests at a time over a small pool of keep-alive connections and under
+a requests-per-second limit. Answers are cached in SQLite keyed by the
+rounded coordinates and expire after a TTL, so rebuilds only probe new
+or stale points. Dead points are dropped; live ones are snapped onto the
+panorama the endpoint reports.
+
+    GOOGLE_MAPS_API_KEY=… python scripts/build_from_geonames.py --probe-coverage
+"""
+import asyncio, http.client, json, os, queue, sqlite3, time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from build_cache import CACHE_DIR
+
+DEFAULT_ENDPOINT = "https://maps.googleapis.com/maps/api/streetview/metadata"
+CACHE_PATH       = os.path.join(CACHE_DIR, "coverage.sqlite3")
+KEY_DECIMALS     = 4                    # cache key precision (~11 m)
+TTL_DAYS         = 30
+SEARCH_RADIUS_M  = 1000                 # how far from the point a panorama may be
+CONCURRENCY      = 16
+RATE_PER_SEC     = 40
+
+OK, DEAD = "OK", "ZERO_RESULTS"
+
+class ProbeError(Exception):
+    pass
+
+class CoverageCache:
+    def __init__(self, path=CACHE_PATH, ttl_days=TTL_DAYS):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db  = sqlite3.connect(path)
+        self.ttl = ttl_days * 86400
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS coverage (
+                lat_key INTEGER, lng_key INTEGER, status TEXT,
+                pano_lat REAL, pano_lng REAL, checked_at REAL,
+                PRIMARY KEY (lat_key, lng_key))""")
+
+    @staticmethod
+    def key(lat, lng):
+        scale = 10 ** KEY_DECIMALS
+        return round(lat * scale), round(lng * scale)
+
+    def get(self, lat, lng):
+        row = self.db.execute(
+            "SELECT status, pano_lat, pano_lng FROM coverage "
+            "WHERE lat_key = ? AND lng_key = ? AND checked_at >= ?",
+            (*self.key(lat, lng), time.time() - self.ttl)).fetchone()
+        return row and (row[0], row[1], row[2])
+
+    def put_many(self, results):
+        now = time.time()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?, ?, ?)",
+            [(*self.key(lat, lng), status, plat, plng, now)
+             for (lat, lng), (status, plat, plng) in results.items()])
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+class RateLimiter:
+    """Token bucket: at most `rate` acquisitions per second, short bursts allowed."""
+
+    def __init__(self, rate, burst=None):
+        self.rate   = rate
+        self.burst  = burst or max(1, int(rate))
+        self.tokens = self.burst
+        self.last   = time.monotonic()
+        self.lock   = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class ConnectionPool:
+    """Keep-alive http.client connections to one host, shared by worker threads."""
+
+    def __init__(self, endpoint, size, timeout=10):
+        url = urlsplit(endpoint)
+        self.path = url.path or "/"
+        conn_cls = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        self.idle = queue.LifoQueue()
+        for _ in range(size):
+            self.idle.put(conn_cls(url.hostname, url.port, timeout=timeout))
+
+    def get_json(self, params):
+        conn = self.idle.get()
+        try:
+            for attempt in (1, 2):  # one retry if a kept-alive socket went stale
+                try:
+                    conn.request("GET", f"{self.path}?{urlencode(params)}")
+                    res = conn.getresponse()
+                    body = res.read()
+                    break
+                except (http.client.HTTPException, OSError):
+                    conn.close()
+                    if attempt == 2:
+                        raise
+            if res.status != 200:
+                raise ProbeError(f"HTTP {res.status}")
+            return json.loads(body)
+        finally:
+            self.idle.put(conn)
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get().close()
+
+def parse_metadata(data):
+    """(status, pano_lat, pano_lng) from a Street View metadata response."""
+    status = data.get("status")
+    if status == OK:
+        loc = data.get("location") or {}
+        return OK, loc.get("lat"), loc.get("lng")
+    if status in (DEAD, "NOT_FOUND"):
+        return DEAD, None, None
+    raise ProbeError(f"{status}: {data.get('error_message', 'unexpected response')}")
+
+async def probe_points(points, endpoint=DEFAULT_ENDPOINT, api_key=None,
+                       concurrency=CONCURRENCY, rate=RATE_PER_SEC, radius_m=SEARCH_RADIUS_M):
+    """Probe (lat, lng) points concurrently; returns {point: (status, lat, lng)}."""
+    pool    = ConnectionPool(endpoint, concurrency)
+    threads = ThreadPoolExecutor(max_workers=concurrency)
+    limiter = RateLimiter(rate)
+    loop    = asyncio.get_running_loop()
+    slots   = asyncio.Semaphore(concurrency)
+    results, errors = {}, []
+
+    async def probe(point):
+        params = {"location": f"{point[0]},{point[1]}", "radius": radius_m, "source": "outdoor"}
+        if api_key:
+            params["key"] = api_key
+        async with slots:
+            await limiter.acquire()
+            try:
+                data = await loop.run_in_executor(threads, pool.get_json, params)
+                results[point] = parse_metadata(data)
+            except (ProbeError, OSError, http.client.HTTPException, ValueError) as e:
+                errors.append((point, str(e)))
+
+    try:
+        await asyncio.gather(*(probe(p) for p in points))
+    finally:
+        threads.shutdown()
+        pool.close()
+    return results, errors
+
+def check_coverage(locations, endpoint=DEFAULT_ENDPOINT, api_key=None, cache_path=CACHE_PATH,
+                   ttl_days=TTL_DAYS, concurrency=CONCURRENCY, rate=RATE_PER_SEC):
+    """
+    Drop locations without Street View and snap the rest onto their
+    panorama. Points the probe could not answer are kept unchanged.
+    Returns (kept_locations, dropped_locations).
+    """
+    cache = CoverageCache(cache_path, ttl_days)
+    try:
+        known, todo = {}, {}
+        for loc in locations:
+            point = (loc["lat"], loc["lng"])
+            hit = cache.get(*point)
+            if hit:
+                known[point] = hit
+            else:
+                todo[point] = None
+        print(f"  🛰  Coverage: {len(known)} cached, probing {len(todo)}…")
+        t0 = time.perf_counter()
+        fresh, errors = asyncio.run(probe_points(todo, endpoint, api_key, concurrency, rate)) if todo else ({}, [])
+        cache.put_many(fresh)
+        known.update(fresh)
+        if todo:
+            print(f"     probed {len(fresh)} in {time.perf_counter() - t0:.1f}s"
+                  + (f", {len(errors)} failed (kept as-is, e.g. {errors[0][1]})" if errors else ""))
+    finally:
+        cache.close()
+
+    kept, dropped = [], []
+    for loc in locations:
+        status, plat, plng = known.get((loc["lat"], loc["lng"]), (None, None, None))
+        if status == DEAD:
+            dropped.append(loc)
+            continue
+        if status == OK and plat is not None:
+            loc = dict(loc, lat=round(plat, 4), lng=round(plng, 4))
+        kept.append(loc)
+    return kept, dropped
+
+def add_probe_arguments(ap):
+    ap.add_argument("--probe-coverage", action="store_true",
+                    help="drop/snap locations without Street View before writing packs "
+                         "(key from $GOOGLE_MAPS_API_KEY)")
+    ap.add_argument("--probe-endpoint", default=DEFAULT_ENDPOINT, metavar="URL",
+                    help="metadata endpoint to probe (default: %(default)s)")
+
+def probe_locations(locations, args):
+    if not args.probe_coverage:
+        return locations
+    kept, dropped = check_coverage(locations, args.probe_endpoint, os.environ.get("GOOGLE_MAPS_API_KEY"))
+    for loc in dropped:
+        print(f"     ✗ no coverage: {loc['label']} ({loc['lat']}, {loc['lng']})")
+    print(f"  🛰  {len(kept)} locations with coverage, {len(dropped)} dropped")
+    return kept
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Difficulty tier per location, from the layout of the whole location set.
+For every location, this stage finds the great-circle distance to its K
+nearest other locations and counts the locations within DENSITY_KM.
+Places far from everything else are harder to pin on the map than ones
+in a dense, familiar region. Locations are ranked by mean k-NN distance
+(fewer neighbours within DENSITY_KM breaks ties towards harder) and each
+pack's ranking is cut into equal tiers, so every pack has easy, medium
+and hard rounds for the picker to balance.
+Both come from the vectorized cube-cell join in nearby_features, at
+most MAX_PAIRS candidate pairs at a time. The k nearest are first
+searched within KNN_START_KM and the radius is widened only for the
+locations still short of K, so dense clusters never compare every pair.
+Locations still short at KNN_MAX_KM are compared against the whole set
+by unit-vector dot products. The picked distances use haversine.
+"""
+import numpy as np
+
+from nearby_features import LocationCells, unit_vectors
+from spatial import EARTH_RADIUS_KM
+
+K            = 5
+DENSITY_KM   = 100
+KNN_START_KM = 10        # first k-NN search radius, widened ×4 for locations still short
+KNN_MAX_KM   = 3000      # past this, the remaining locations are compared against all
+TIER_NAMES   = ("easy", "medium", "hard")
+CHUNK        = 4096      # rows per dot-product pass
+MAX_PAIRS    = 1 << 22   # candidate pairs checked per cell-join pass
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    la1, ln1, la2, ln2 = (np.radians(a) for a in (lat1, lng1, lat2, lng2))
+    a = np.sin((la2 - la1) / 2) ** 2 + np.cos(la1) * np.cos(la2) * np.sin((ln2 - ln1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def _batches(sizes, limit):
+    """(start, end) runs of rows whose sizes add up to at most `limit` (one row at least)."""
+    total = np.cumsum(sizes)
+    start = 0
+    while start < len(sizes):
+        done = total[start - 1] if start else 0
+        end = max(int(np.searchsorted(total, done + limit, "right")), start + 1)
+        yield start, end
+        start = end
+
+def _pairs(cells, rows):
+    """Per batch of `rows`: (batch, index into batch, other location, chord²) within the radius, self excluded."""
+    for start, end in _batches(cells.candidates(cells.xyz[rows]), MAX_PAIRS):
+        batch = rows[start:end]
+        point, other, d2 = cells.pairs(cells.xyz[batch])
+        mask = batch[point] != other
+        yield batch, point[mask], other[mask], d2[mask]
+
+def knn_stats(lat, lng, k=K, density_km=DENSITY_KM):
+    """(km to the k nearest other locations, sorted — n × k; neighbours within density_km — n)."""
+    lat, lng = np.asarray(lat, dtype=np.float64), np.asarray(lng, dtype=np.float64)
+    n = len(lat)
+    k = min(k, n - 1)
+    density = np.zeros(n, dtype=np.int64)
+    if k <= 0:
+        return np.zeros((n, 0)), density
+    rows = np.arange(n)
+    for batch, point, _, _ in _pairs(LocationCells(lat, lng, density_km), rows):
+        density[batch] = np.bincount(point, minlength=len(batch))
+
+    # k nearest: search a small radius first and widen it only for the rows still short
+    nearest = np.empty((n, k), dtype=np.int64)
+    radius = KNN_START_KM
+    while len(rows) and radius < KNN_MAX_KM:
+        short = []
+        for batch, point, other, d2 in _pairs(LocationCells(lat, lng, radius), rows):
+            counts = np.bincount(point, minlength=len(batch))
+            order = np.lexsort((d2, point))
+            point, other = point[order], other[order]
+            rank = np.arange(len(point)) - np.repeat(np.cumsum(counts) - counts, counts)
+            keep = (rank < k) & (counts >= k)[point]
+            nearest[batch[point[keep]], rank[keep]] = other[keep]
+            short.append(batch[counts < k])
+        rows = np.concatenate(short)
+        radius *= 4
+
+    # Whatever is left is remote: compare against every location
+    xyz = unit_vectors(lat, lng)
+    for start in range(0, len(rows), CHUNK):
+        part = rows[start:start + CHUNK]
+        dot = xyz[part] @ xyz.T
+        dot[np.arange(len(part)), part] = -np.inf
+        nearest[part] = np.argpartition(-dot, k - 1, axis=1)[:, :k]
+    knn = np.sort(haversine_km(lat[:, None], lng[:, None], lat[nearest], lng[nearest]), axis=1)
+    return knn, density
+
+def tiers_for(knn, density, tiers=len(TIER_NAMES)):
+    """Tier per location (0 = easiest), equal-sized groups by isolation."""
+    n = len(density)
+    isolation = knn.mean(axis=1) if knn.shape[1] else np.zeros(n)
+    order = np.lexsort((-density, isolation))
+    tier = np.empty(n, dtype=np.int64)
+    tier[order] = np.arange(n) * tiers // max(n, 1)
+    return tier
+
+def add_difficulty(locations, k=K, density_km=DENSITY_KM):
+    """Copies of `locations` with a "tier"; neighbours come from the whole set, tiers are cut per pack."""
+    knn, density = knn_stats([l["lat"] for l in locations], [l["lng"] for l in locations], k, density_km)
+    tier = np.zeros(len(locations), dtype=np.int64)
+    packs = {}
+    for i, loc in enumerate(locations):
+        packs.setdefault(loc.get("pack", "unusual"), []).append(i)
+    for rows in packs.values():
+        tier[rows] = tiers_for(knn[rows], density[rows])
+    counts = np.bincount(tier, minlength=len(TIER_NAMES)).tolist() if len(tier) else [0] * len(TIER_NAMES)
+    print("  🎯 Difficulty tiers: " + ", ".join(f"{c} {name}" for name, c in zip(TIER_NAMES, counts)))
+    return [{**loc, "tier": t} for loc, t in zip(locations, tier.tolist())]
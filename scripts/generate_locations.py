@@ -1,18 +1,26 @@
 #!/usr/bin/env python3
 """
 Generate ~400 globally balanced Street View locations for G.O. Guesser.
-Outputs:
-  - data/locations.json (master list)
-  - data/packs/europe.json
-  - data/packs/latin-america.json
-  - data/packs/asia.json
-  - data/packs/africa.json
-  - data/packs/north-america.json
-  - data/packs/oceania.json
-  - data/packs/unusual.json
+Outputs (shard file names carry a content hash, e.g. europe-0.3f9c0a1b2e.json):
+  - data/manifest.json (pack list: ids, labels, counts, sizes, shards)
+  - data/shards/<pack>-<n>.*.{json,bin} (each pack in 32-location pieces)
+  - data/precache.js (the files sw.js caches on install)
+  - data/location_ids.json (stable id of every location, append-only)
+  - data/packs/<pack>.*.ndjson (whole packs, only with --ndjson)
 """
-import json
+import argparse
 import os
+import sys
+
+from build_cache import watch
+from coverage_probe import add_probe_arguments, probe_locations
+from difficulty import add_difficulty
+from pack_writer import add_output_arguments, write_outputs
+from reverse_geocode import add_geocode_arguments, geocode_locations
+from spatial import near_duplicates, print_duplicates
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEDUP_KM = 0.1  # landmarks a few hundred metres apart (South Bank, Parliament) are kept
 
 # All locations: lat, lng, label, pack, words (English vocab visible at this location)
 LOCATIONS = [
@@ -462,52 +470,29 @@ LOCATIONS = [
    "words": ["market", "Independence Avenue", "jacaranda tree", "minibus", "wire sculpture"]},
 ]
 
-def build_packs(locations):
-    packs = {}
-    for loc in locations:
-        p = loc["pack"]
-        if p not in packs:
-            packs[p] = []
-        entry = {k: v for k, v in loc.items() if k != "pack"}
-        packs[p].append(entry)
-    return packs
-
-def main():
-    base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    data_dir = os.path.join(base, "data")
-    packs_dir = os.path.join(data_dir, "packs")
-    os.makedirs(packs_dir, exist_ok=True)
-
-    # Master list (no pack key)
-    master = [{k: v for k, v in loc.items() if k != "pack"} for loc in LOCATIONS]
-    master_path = os.path.join(data_dir, "locations.json")
-    with open(master_path, "w", encoding="utf-8") as f:
-        json.dump(master, f, ensure_ascii=False, indent=2)
-    print(f"✅ locations.json — {len(master)} locations")
-
-    # Themed packs
-    packs = build_packs(LOCATIONS)
-    pack_labels = {
-        "europe": "🌍 Europe",
-        "latin-america": "🌎 Latin America",
-        "asia": "🌏 Asia & Middle East",
-        "africa": "🌍 Africa",
-        "north-america": "🌎 North America",
-        "oceania": "🌏 Oceania & Pacific",
-        "unusual": "🗺️ Unusual Places",
-    }
-    for pack_key, locs in packs.items():
-        pack_data = {
-            "id": pack_key,
-            "label": pack_labels.get(pack_key, pack_key.title()),
-            "locations": locs,
-        }
-        pack_path = os.path.join(packs_dir, f"{pack_key}.json")
-        with open(pack_path, "w", encoding="utf-8") as f:
-            json.dump(pack_data, f, ensure_ascii=False, indent=2)
-        print(f"  📦 {pack_key}.json — {len(locs)} locations")
-
-    print(f"\n🌐 Total: {len(master)} locations across {len(packs)} packs")
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Write the curated LOCATIONS to data/")
+    ap.add_argument("--data-dir", default=os.path.join(BASE, "data"))
+    ap.add_argument("--watch", action="store_true",
+                    help="rebuild whenever this file is saved")
+    ap.add_argument("--dedup-km", type=float, default=DEDUP_KM, metavar="KM",
+                    help="drop locations this close to an earlier one in LOCATIONS (default: %(default)s)")
+    add_probe_arguments(ap)
+    add_geocode_arguments(ap)
+    add_output_arguments(ap)
+    args = ap.parse_args(argv)
+    if args.watch:
+        watch([os.path.abspath(__file__)], sys.argv[1:])
+        return
+
+    # Only files whose contents changed are rewritten
+    locations, dropped = near_duplicates(LOCATIONS, args.dedup_km)
+    print_duplicates(dropped, args.dedup_km)
+    locations = probe_locations(locations, args)
+    locations = geocode_locations(locations, args)
+    locations = add_difficulty(locations)
+    packs = write_outputs(locations, args.data_dir, args.ndjson)
+    print(f"\n🌐 Total: {len(locations)} locations across {len(packs)} packs")
 
 if __name__ == "__main__":
     main()
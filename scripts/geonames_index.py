@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Per-country byte-range index for an uncompressed GeoNames dump.
+A one-time scan records where each country's rows with at least
+INDEX_MIN_POP inhabitants sit in the file (runs of consecutive rows are
+merged into one range) and saves them next to the dump as
+<dump>.ccidx.npz. Builds then mmap the dump and parse only the ranges of
+the countries they need, in file order, so the result is row-for-row
+what a full scan would have kept. The index remembers the dump's size
+and mtime and is ignored once either changes.
+
+    python scripts/geonames_index.py /tmp/allCountries.txt
+"""
+import argparse, mmap, os, sys, time
+
+import numpy as np
+
+from geonames_io import CHUNK_SIZE, COL_COUNTRY, COL_POP, is_seekable_dump
+
+INDEX_SUFFIX  = ".ccidx.npz"
+INDEX_MIN_POP = 1000       # smaller places are left out; builds need MIN_POPULATION >= this
+INDEX_VERSION = 1
+
+def index_path(filepath):
+    return filepath + INDEX_SUFFIX
+
+def _scan(filepath, min_pop):
+    # Yield (cc, start, end) for every row worth indexing; end excludes the newline
+    min_digits = len(str(min_pop))
+    pos = 0
+    with open(filepath, "rb") as f:
+        for line in f:
+            start, pos = pos, pos + len(line)
+            parts = line.split(b"\t", COL_POP + 1)
+            if len(parts) <= COL_POP:
+                continue
+            pop = parts[COL_POP]
+            if len(pop) >= min_digits and pop.isdigit() and int(pop) >= min_pop:
+                yield parts[COL_COUNTRY], start, pos - 1 if line.endswith(b"\n") else pos
+
+def build_index(filepath, min_pop=INDEX_MIN_POP):
+    """Scan the dump once and write its sidecar index; returns the index path."""
+    ranges = {}   # cc -> [[start, end], …]
+    last_cc = None
+    for cc, start, end in _scan(filepath, min_pop):
+        runs = ranges.setdefault(cc, [])
+        if cc == last_cc and runs[-1][1] + 1 == start:
+            runs[-1][1] = end   # the previous row was the same country: extend its range
+        else:
+            runs.append([start, end])
+        last_cc = cc
+    countries = sorted(ranges)
+    bounds = np.cumsum([0] + [len(ranges[cc]) for cc in countries])
+    spans = np.array([r for cc in countries for r in ranges[cc]], dtype=np.int64).reshape(-1, 2)
+    st = os.stat(filepath)
+    path = index_path(filepath)
+    with open(path + ".tmp", "wb") as f:
+        np.savez(f, countries=np.array([c.decode("ascii", "replace") for c in countries]),
+                 bounds=bounds, spans=spans,
+                 meta=np.array([INDEX_VERSION, st.st_size, st.st_mtime_ns, min_pop], dtype=np.int64))
+    os.replace(path + ".tmp", path)
+    return path
+
+def load_index(filepath, min_pop):
+    """The dump's index if it exists, is current and holds every row >= min_pop; else None."""
+    if not is_seekable_dump(filepath) or not os.path.exists(index_path(filepath)):
+        return None
+    try:
+        index = dict(np.load(index_path(filepath)))
+    except (OSError, ValueError):
+        return None
+    version, size, mtime_ns, indexed_pop = index["meta"].tolist()
+    st = os.stat(filepath)
+    if version != INDEX_VERSION or size != st.st_size or mtime_ns != st.st_mtime_ns or indexed_pop > min_pop:
+        return None
+    return index
+
+def indexed_lines(filepath, countries, min_pop):
+    """
+    Iterator over the indexed lines of `countries` in file order, read
+    through mmap — or None when there is no usable index for this dump.
+    """
+    index = load_index(filepath, min_pop)
+    if index is None:
+        return None
+    bounds, spans = index["bounds"], index["spans"]
+    wanted = [k for k, cc in enumerate(index["countries"].tolist()) if cc in countries]
+    parts = [spans[bounds[k]:bounds[k + 1]] for k in wanted]
+    spans = np.concatenate(parts) if parts else np.empty((0, 2), dtype=np.int64)
+    spans = spans[np.argsort(spans[:, 0], kind="stable")]
+    return _read_spans(filepath, spans)
+
+def _read_spans(filepath, spans):
+    if not len(spans):
+        return
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Back-to-back ranges (different countries) are read as one slice, up to CHUNK_SIZE
+        (run_start, run_end), *rest = spans.tolist()
+        for start, end in rest:
+            if start == run_end + 1 and end - run_start <= CHUNK_SIZE:
+                run_end = end
+                continue
+            yield from mm[run_start:run_end].split(b"\n")
+            run_start, run_end = start, end
+        yield from mm[run_start:run_end].split(b"\n")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Write the per-country index for an uncompressed GeoNames dump")
+    ap.add_argument("dump", help="plain .txt dump (e.g. allCountries.txt)")
+    ap.add_argument("--min-pop", type=int, default=INDEX_MIN_POP,
+                    help="leave smaller places out of the index (default: %(default)s)")
+    args = ap.parse_args(argv)
+    if not is_seekable_dump(args.dump):
+        sys.exit(f"{args.dump}: the index needs an uncompressed .txt dump (mmap)")
+    t0 = time.perf_counter()
+    path = build_index(args.dump, args.min_pop)
+    index = np.load(path)
+    print(f"✅ {path} — {len(index['spans']):,} ranges over {len(index['countries'])} countries "
+          f"in {time.perf_counter() - t0:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for GeoNames dumps (cities1000.txt, allCountries.zip, …)
+Reads plain .txt or .zip/.gz/.bz2 archives without extracting them first.
+Decompression runs in a background thread so it overlaps with parsing,
+and rows are rejected on the cheap columns (country, population) before
+lat/lng are parsed or a record is built.
+"""
+import bz2, gzip, os, queue, threading, zipfile
+
+CHUNK_SIZE  = 1 << 20   # bytes handed from the reader thread to the parser
+QUEUE_DEPTH = 8         # chunks buffered ahead of the parser
+
+# GeoNames tab-separated columns (0-indexed) — see build_from_geonames.py
+COL_ID, COL_NAME, COL_LAT, COL_LNG = 0, 1, 4, 5
+COL_FEAT_CLASS, COL_FEAT_CODE, COL_COUNTRY, COL_POP = 6, 7, 8, 14
+
+def open_dump(filepath, member=None):
+    """
+    Open a GeoNames dump as a binary stream, whatever the container.
+    `member` picks the file inside a .zip that holds several (e.g.
+    alternateNamesV2.txt next to iso-languagecodes.txt).
+    """
+    lower = filepath.lower()
+    if lower.endswith(".zip"):
+        zf = zipfile.ZipFile(filepath)
+        members = [n for n in zf.namelist() if n.endswith(member or ".txt") and "readme" not in n.lower()]
+        if not members:
+            zf.close()
+            raise ValueError(f"{filepath}: no {member or '.txt'} member in archive")
+        stream = zf.open(members[0])
+        # Keep the archive alive as long as the member stream is open
+        stream._geonames_zip = zf
+        return stream
+    if lower.endswith(".gz"):
+        return gzip.open(filepath, "rb")
+    if lower.endswith(".bz2"):
+        return bz2.open(filepath, "rb")
+    return open(filepath, "rb")
+
+def _pump(stream, q, stop):
+    try:
+        while not stop.is_set():
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            q.put(chunk)
+        q.put(None)
+    except BaseException as e:  # re-raised on the consumer side
+        q.put(e)
+    finally:
+        stream.close()
+
+def iter_lines(filepath, member=None):
+    """Yield raw lines (bytes, no newline) while a thread decompresses ahead."""
+    stream = open_dump(filepath, member)
+    q, stop = queue.Queue(maxsize=QUEUE_DEPTH), threading.Event()
+    reader = threading.Thread(target=_pump, args=(stream, q, stop), daemon=True)
+    reader.start()
+    tail = b""
+    try:
+        while True:
+            chunk = q.get()
+            if chunk is None:
+                break
+            if isinstance(chunk, BaseException):
+                raise chunk
+            lines = (tail + chunk).split(b"\n")
+            tail = lines.pop()
+            yield from lines
+        if tail:
+            yield tail
+    finally:
+        # Unblock the reader if the consumer stopped early
+        stop.set()
+        while reader.is_alive():
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                reader.join(0.05)
+
+def is_seekable_dump(filepath):
+    return not filepath.lower().endswith((".zip", ".gz", ".bz2"))
+
+def byte_ranges(filepath, parts):
+    """Split an uncompressed dump into `parts` newline-aligned (start, end) ranges."""
+    size = os.path.getsize(filepath)
+    bounds = [0]
+    with open(filepath, "rb") as f:
+        for k in range(1, parts):
+            f.seek(max(size * k // parts, bounds[-1]))
+            f.readline()  # move to the start of the next full line
+            pos = min(f.tell(), size)
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    if bounds[-1] < size:
+        bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+def iter_range_lines(filepath, start, end):
+    """Yield the lines of one range produced by byte_ranges()."""
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        tail = b""
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            lines = (tail + chunk).split(b"\n")
+            tail = lines.pop()
+            yield from lines
+        if tail:
+            yield tail
+
+def parse_rows(lines, countries, min_pop, stats=None, known=()):
+    """
+    Filter raw GeoNames lines and yield
+    (geonameid, name, lat, lng, cc, pop, feat) tuples.
+    `countries` is a set of accepted ISO codes (str). Rows are rejected on
+    country and population before anything else is decoded or converted.
+    `stats` collects row counts and rejects by reason (malformed, country,
+    population). Rows of `known` countries that were not asked for this
+    time (a partial rebuild) count as "not_requested", not as "country".
+    """
+    accept = {cc.encode("ascii") for cc in countries}
+    skip = {cc.encode("ascii") for cc in known} - accept
+    min_digits = len(str(min_pop))
+    rows = kept = malformed = country = skipped = small = 0
+    for line in lines:
+        rows += 1
+        parts = line.split(b"\t", COL_POP + 1)
+        if len(parts) <= COL_POP:
+            malformed += 1
+            continue
+        if parts[COL_COUNTRY] not in accept:
+            if parts[COL_COUNTRY] in skip:
+                skipped += 1
+            else:
+                country += 1
+            continue
+        pop = parts[COL_POP]
+        # Fewer digits than min_pop can never reach it — skip int()
+        if len(pop) < min_digits:
+            small += 1
+            continue
+        try:
+            pop = int(pop)
+            if pop < min_pop:
+                small += 1
+                continue
+            lat = float(parts[COL_LAT])
+            lng = float(parts[COL_LNG])
+            gid = int(parts[COL_ID])
+        except ValueError:
+            malformed += 1
+            continue
+        kept += 1
+        yield (gid, parts[COL_NAME].decode("utf-8", "replace"), lat, lng,
+               parts[COL_COUNTRY].decode("ascii"), pop,
+               parts[COL_FEAT_CODE].decode("ascii", "replace"))
+    if stats is not None:
+        for key, n in (("rows", rows), ("kept", kept), ("malformed", malformed),
+                       ("country", country), ("not_requested", skipped), ("population", small)):
+            stats[key] = stats.get(key, 0) + n
+
+def iter_cities(filepath, countries, min_pop, stats=None, known=()):
+    """Stream eligible city rows straight from a (possibly compressed) dump."""
+    return parse_rows(iter_lines(filepath), countries, min_pop, stats, known)
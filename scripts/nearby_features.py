@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Vocabulary from what is actually around each location. GeoNames feature
+points of class S, H, T and L (churches, rivers, markets, parks,
+stations…) are joined against the generated locations within
+NEARBY_KM, and their feature codes become the location's words.
+The feature points are pulled out of allCountries once and cached as
+numpy arrays. The join is vectorized: every location is hashed into the
+cube cells its radius can reach (the cell scheme of spatial.SpatialGrid),
+each batch of features finds its cell with one searchsorted, and only
+those candidate pairs get an exact distance check.
+"""
+import os, time
+from array import array
+
+import numpy as np
+
+from build_cache import config_hash
+from geonames_io import COL_FEAT_CLASS, COL_FEAT_CODE, COL_LAT, COL_LNG, iter_lines
+from spatial import chord_for_km
+
+FEATURES_FILE      = "/tmp/allCountries.zip"
+NEARBY_KM          = 2.0
+WORDS_PER_LOCATION = 5
+MIN_FEATURE_WORDS  = 2        # with fewer nearby words a location keeps its continent list
+JOIN_BATCH         = 1 << 20  # feature points joined per numpy pass
+FEATURE_CLASSES    = {b"S", b"H", b"T", b"L"}
+
+# GeoNames feature code → word; codes not listed here are ignored
+FEATURE_WORDS = {
+    # S: spots and buildings
+    "CH": "church", "MSQE": "mosque", "TMPL": "temple", "SHRN": "shrine", "MSTY": "monastery",
+    "CSTL": "castle", "PAL": "palace", "FT": "fort", "MUS": "museum", "LIBR": "library",
+    "THTR": "theatre", "OPRA": "opera house", "STDM": "stadium", "SCH": "school", "UNIV": "university",
+    "HSP": "hospital", "MKT": "market", "MALL": "shopping centre", "HTL": "hotel", "REST": "restaurant",
+    "RSTN": "railway station", "MTRO": "metro station", "BUSTN": "bus station", "AIRP": "airport",
+    "PO": "post office", "TOWR": "tower", "MNMT": "monument", "SQR": "square", "BDG": "bridge",
+    "LTHSE": "lighthouse", "PIER": "pier", "CMTY": "cemetery", "ZOO": "zoo", "GDN": "garden",
+    "RUIN": "ruins", "HSTS": "historical site", "MFG": "factory", "FRM": "farm", "DAM": "dam",
+    # H: water
+    "STM": "river", "STMI": "river", "LK": "lake", "LKS": "lakes", "BAY": "bay", "HBR": "harbour",
+    "CNL": "canal", "SPNG": "spring", "WTRF": "waterfall", "RSV": "reservoir", "LGN": "lagoon",
+    "COVE": "cove", "MRSH": "marsh",
+    # T: terrain
+    "MT": "mountain", "MTS": "mountains", "HLL": "hill", "HLLS": "hills", "PK": "peak",
+    "BCH": "beach", "ISL": "island", "VAL": "valley", "CLF": "cliff", "CAPE": "cape",
+    "VLC": "volcano", "DUNE": "dune", "PASS": "mountain pass", "GRGE": "gorge",
+    # L: areas
+    "PRK": "park", "PRT": "port", "RESN": "nature reserve", "CTRB": "business district",
+    "INDS": "industrial area", "VIN": "vineyard", "OAS": "oasis",
+}
+WORDS = sorted(set(FEATURE_WORDS.values()))
+
+_OFFSET = 1 << 20   # cell coordinates are packed into 21 bits each
+_NEIGHBOURS = np.array([(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)])
+
+def extract_features(filepath, stats=None):
+    """{"xyz", "word"} arrays (float32 unit vectors) for every feature point with a listed code."""
+    word_of = {code.encode("ascii"): WORDS.index(word) for code, word in FEATURE_WORDS.items()}
+    lat, lng, word = array("f"), array("f"), array("H")
+    rows = 0
+    for line in iter_lines(filepath):
+        rows += 1
+        parts = line.split(b"\t", COL_FEAT_CODE + 1)
+        if len(parts) <= COL_FEAT_CODE or parts[COL_FEAT_CLASS] not in FEATURE_CLASSES:
+            continue
+        w = word_of.get(parts[COL_FEAT_CODE])
+        if w is None:
+            continue
+        try:
+            la, ln = float(parts[COL_LAT]), float(parts[COL_LNG])
+        except ValueError:
+            continue
+        lat.append(la)
+        lng.append(ln)
+        word.append(w)
+    if stats is not None:
+        stats["rows"] = stats.get("rows", 0) + rows
+    return {"xyz": unit_vectors(np.frombuffer(lat, dtype=np.float32), np.frombuffer(lng, dtype=np.float32),
+                                np.float32),
+            "word": np.frombuffer(word, dtype=np.uint16)}
+
+def unit_vectors(lat, lng, dtype=np.float64):
+    la, ln = np.radians(np.asarray(lat, dtype=np.float64)), np.radians(np.asarray(lng, dtype=np.float64))
+    c = np.cos(la)
+    return np.stack([c * np.cos(ln), c * np.sin(ln), np.sin(la)], axis=1).astype(dtype, copy=False)
+
+def _cell_keys(cells):
+    c = cells + _OFFSET
+    return (c[:, 0] << 42) | (c[:, 1] << 21) | c[:, 2]
+
+class LocationCells:
+    """Locations hashed into every cube cell within one cell of their own."""
+
+    def __init__(self, lat, lng, radius_km):
+        chord = chord_for_km(radius_km)
+        self.chord2 = chord ** 2
+        self.cell = max(chord, 1e-5)
+        self.xyz = unit_vectors(lat, lng, np.float32)   # same rounding as the feature points
+        base = np.floor(self.xyz / self.cell).astype(np.int64)
+        keys = np.concatenate([_cell_keys(base + d) for d in _NEIGHBOURS])
+        owner = np.tile(np.arange(len(self.xyz)), len(_NEIGHBOURS))
+        order = np.argsort(keys, kind="stable")
+        self.owner = owner[order]
+        # One entry per occupied cell: its key and its run of owners
+        self.keys, self.starts, self.counts = np.unique(keys[order], return_index=True, return_counts=True)
+
+    def _lookup(self, xyz):
+        keys = _cell_keys(np.floor(xyz / self.cell).astype(np.int64))
+        cell = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return cell, np.where(self.keys[cell] == keys, self.counts[cell], 0)
+
+    def candidates(self, xyz):
+        """Per point, how many locations share its cell neighbourhood (pairs() checks that many)."""
+        return self._lookup(xyz)[1]
+
+    def pairs(self, xyz):
+        """(point index, location index, chord²) for every point within the radius of a location."""
+        cell, n = self._lookup(xyz)
+        lo = self.starts[cell]
+        point = np.repeat(np.arange(len(n)), n)
+        pos = np.arange(len(point)) - np.repeat(np.cumsum(n) - n, n) + np.repeat(lo, n)
+        loc = self.owner[pos]
+        d2 = ((xyz[point] - self.xyz[loc]) ** 2).sum(axis=1)
+        near = d2 <= self.chord2
+        return point[near], loc[near], d2[near]
+
+def nearby_words(locations, features, radius_km=NEARBY_KM, limit=WORDS_PER_LOCATION):
+    """Per location, up to `limit` words for the features around it: most frequent first, then nearest."""
+    words = [[] for _ in locations]
+    if not locations or not len(features["word"]):
+        return words
+    cells = LocationCells([l["lat"] for l in locations], [l["lng"] for l in locations], radius_km)
+    found = []
+    for start in range(0, len(features["word"]), JOIN_BATCH):
+        part = slice(start, start + JOIN_BATCH)
+        point, loc, d2 = cells.pairs(features["xyz"][part])
+        found.append((loc, features["word"][part][point], d2))
+    loc, word, d2 = (np.concatenate(cols) for cols in zip(*found))
+    key = loc * len(WORDS) + word
+    uniq, inv, counts = np.unique(key, return_inverse=True, return_counts=True)
+    nearest = np.full(len(uniq), np.inf)
+    np.minimum.at(nearest, inv, d2)
+    for k in np.lexsort((nearest, -counts, uniq // len(WORDS))).tolist():
+        picked = words[uniq[k] // len(WORDS)]
+        if len(picked) < limit:
+            picked.append(WORDS[uniq[k] % len(WORDS)])
+    return words
+
+def apply_nearby_words(locations, features, radius_km=NEARBY_KM):
+    """Put nearby-feature words first in each location's list; returns how many locations changed."""
+    changed = 0
+    for loc, words in zip(locations, nearby_words(locations, features, radius_km)):
+        if len(words) < MIN_FEATURE_WORDS:
+            continue
+        loc["words"] = (words + [w for w in loc["words"] if w not in words])[:WORDS_PER_LOCATION]
+        changed += 1
+    return changed
+
+def add_feature_arguments(ap):
+    ap.add_argument("--features", default=FEATURES_FILE, metavar="PATH",
+                    help="GeoNames allCountries dump whose S/H/T/L feature points give generated "
+                         "locations their words (default: %(default)s; skipped if missing)")
+    ap.add_argument("--nearby-km", type=float, default=NEARBY_KM, metavar="KM",
+                    help="radius for nearby features (default: %(default)s)")
+
+def load_features(args, cache, report=None):
+    """The dump's feature points, extracted once and cached as .npz by file hash."""
+    path = args.features
+    if not path or not os.path.exists(path):
+        print(f"  ⚠️  {path} not found — words come from the continent lists")
+        return None
+    key = config_hash(cache.file_hash(path), FEATURE_WORDS)[:16]
+    cached = os.path.join(cache.dir, f"features-{key}.npz")
+    if not args.no_cache and os.path.exists(cached):
+        with np.load(cached) as z:
+            return {k: z[k] for k in ("xyz", "word")}
+    stats = {}
+    t0 = time.perf_counter()
+    features = extract_features(path, stats)
+    print(f"  🏷  Extracted {len(features['word']):,} feature points from {stats['rows']:,} rows "
+          f"in {time.perf_counter() - t0:.1f}s")
+    if report is not None:
+        report.count("features", {"scanned": stats["rows"], "points": len(features["word"])})
+    os.makedirs(cache.dir, exist_ok=True)
+    for old in os.listdir(cache.dir):
+        if old.startswith("features-") and old.endswith(".npz"):
+            os.remove(os.path.join(cache.dir, old))
+    with open(cached + ".tmp", "wb") as f:
+        np.savez(f, **features)
+    os.replace(cached + ".tmp", cached)
+    return features
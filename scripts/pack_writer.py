@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Writes data/shards/ and data/manifest.json from a flat list of
+locations (each carrying a "pack" key). Shared by generate_locations.py
+and build_from_geonames.py. Files whose bytes would not change are left
+alone, so an incremental rebuild only touches the packs that changed.
+The game reads every pack, and "All", from its shards, so no whole-pack
+copy is written (except the NDJSON packs below).
+
+Shard files are named after their content hash
+(europe-0.3f9c0a1b2e.json), so they can be served with immutable caching.
+manifest.json is the one small file that changes with every build: it
+lists each pack's id, label, count and total JSON and binary sizes, and
+each of its shards' file names, count, hash and sizes. The game reads
+the manifest to render the pack list.
+data/precache.js lists what the service worker (sw.js) caches on
+install: the manifest, the binary shards and the label tables, under a
+version that is the hash of their contents.
+
+With --ndjson, each whole pack is also written to
+data/packs/<pack>.<hash>.ndjson: one location per line, words inline, streamed to disk one
+line at a time so no second copy of the pack is built in memory. Lines
+are in a fixed shuffled order (seeded by the pack id), so any prefix is
+a fair sample of the pack: the game parses the file as it downloads and
+starts once the first rounds have arrived.
+
+Word lists repeat heavily (generated entries draw from a few dozen
+five-word lists), so each JSON file carries a "vocab" table of distinct
+word lists and every location stores its index "w" instead of "words".
+
+Every location carries a stable integer "id" from data/location_ids.json,
+an append-only registry keyed by GeoNames id for generated locations and
+by label for curated ones, so the game can remember which locations a
+class has already seen across rebuilds. Coordinates are not part of the
+key: a coverage snap or a nudged curated point keeps its id.
+
+Every JSON file also gets a compact binary twin (.bin) that index.html
+reads as typed arrays. Layout, all little-endian, 4-byte aligned:
+  header   u32 × 9   magic "SAPK", version, count N, coord scale,
+                     string count S, word-ref count W, string bytes B,
+                     pack id string, pack label string
+  lat      i32[N]    degrees × scale
+  lng      i32[N]
+  id       u32[N]    stable location id
+  label    u32[N]    string index
+  cc       u32[N]    string index (country code, "" if unknown)
+  continent u32[N]   string index (continent code, "" if unknown)
+  tier     u32[N]    difficulty tier, 0 = easiest (NO_TIER if unscored)
+  words    u32[N+1]  start of each location's run in word refs
+  refs     u32[W]    string index
+  strings  u32[S+1]  byte offsets into the UTF-8 blob
+  blob     u8[B]
+"""
+import hashlib, json, os, random, struct
+from array import array
+
+from build_cache import write_if_changed
+
+PACK_LABELS = {
+    "europe":        "🌍 Europe",
+    "latin-america": "🌎 Latin America",
+    "asia":          "🌏 Asia & Middle East",
+    "africa":        "🌍 Africa",
+    "north-america": "🌎 North America",
+    "oceania":       "🌏 Oceania & Pacific",
+    "unusual":       "🗺️ Unusual Places",
+}
+
+# Build-time keys that are not written into the packs
+INTERNAL_KEYS = ("pack", "labels", "gid")
+
+def strip_pack(loc):
+    return {k: v for k, v in loc.items() if k not in INTERNAL_KEYS}
+
+def group_packs(locations):
+    packs = {}
+    for loc in locations:
+        packs.setdefault(loc.get("pack", "unusual"), []).append(strip_pack(loc))
+    return packs
+
+def id_key(loc):
+    return f"gid:{loc['gid']}" if "gid" in loc else f"label:{loc['label']}"
+
+def legacy_id_key(loc):
+    """Registry key of older builds (label and 0.01°-rounded coordinates)."""
+    return f"{loc['label']}@{loc['lat']:.2f},{loc['lng']:.2f}"
+
+def assign_ids(locations, registry_path):
+    """Give every location its registered id, registering new ones at the end."""
+    try:
+        with open(registry_path, encoding="utf-8") as f:
+            registry = json.load(f)
+    except (OSError, ValueError):
+        registry = {"next": 0, "ids": {}}
+    ids = registry["ids"]
+    out, used = [], {}
+    for loc in locations:
+        key = id_key(loc)
+        # Two different places under one label (no GeoNames id): later ones get #2, #3…
+        used[key] = used.get(key, 0) + 1
+        if used[key] > 1:
+            key = f"{key}#{used[key]}"
+        if key not in ids:
+            legacy = ids.pop(legacy_id_key(loc), None)
+            if legacy is None:
+                legacy = registry["next"]
+                registry["next"] += 1
+            ids[key] = legacy
+        out.append({"id": ids[key], **{k: v for k, v in loc.items() if k != "id"}})
+    write_if_changed(registry_path, dump_json(registry))
+    return out
+
+def encode_vocab(locs):
+    """Replace each location's "words" with an index into a shared vocab table."""
+    vocab, out = {}, []
+    for loc in locs:
+        entry = {k: v for k, v in loc.items() if k != "words"}
+        entry["w"] = vocab.setdefault(tuple(loc.get("words", ())), len(vocab))
+        out.append(entry)
+    return [list(words) for words in vocab], out
+
+def dump_json(data):
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+BIN_MAGIC   = b"SAPK"
+BIN_VERSION = 4
+NO_TIER     = 0xFFFFFFFF
+SHARD_SIZE  = 32
+HASH_LEN    = 10      # hex digits of the content hash in file names
+MANIFEST_VERSION = 1
+COORD_SCALE = 10_000  # 1e-4° ≈ 11 m, the precision build_location rounds to
+
+class StringTable:
+    def __init__(self):
+        self.index = {}
+
+    def add(self, s):
+        return self.index.setdefault(s, len(self.index))
+
+    def pack(self):
+        offsets, blob = array("I", [0]), bytearray()
+        for s in self.index:
+            blob += s.encode("utf-8")
+            offsets.append(len(blob))
+        blob += b"\0" * (-len(blob) % 4)
+        return offsets, bytes(blob)
+
+def encode_binary(pack_id, label, locs):
+    strings = StringTable()
+    id_ref, label_ref = strings.add(pack_id), strings.add(label)
+    lat, lng, ids, labels = array("i"), array("i"), array("I"), array("I")
+    ccs, continents, tiers = array("I"), array("I"), array("I")
+    starts, refs = array("I", [0]), array("I")
+    for loc in locs:
+        lat.append(round(loc["lat"] * COORD_SCALE))
+        lng.append(round(loc["lng"] * COORD_SCALE))
+        ids.append(loc["id"])
+        labels.append(strings.add(loc["label"]))
+        ccs.append(strings.add(loc.get("cc") or ""))
+        continents.append(strings.add(loc.get("continent") or ""))
+        tiers.append(loc.get("tier", NO_TIER))
+        refs.extend(strings.add(w) for w in loc.get("words", ()))
+        starts.append(len(refs))
+    offsets, blob = strings.pack()
+    header = struct.pack("<4s8I", BIN_MAGIC, BIN_VERSION, len(locs), COORD_SCALE,
+                         len(offsets) - 1, len(refs), offsets[-1], id_ref, label_ref)
+    body = [lat, lng, ids, labels, ccs, continents, tiers, starts, refs, offsets]
+    if struct.pack("=I", 1) != struct.pack("<I", 1):
+        for a in body:
+            a.byteswap()
+    return header + b"".join(a.tobytes() for a in body) + blob
+
+def hashed_name(stem, ext, data):
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LEN]}{ext}"
+
+def write_pack(out_dir, stem, pack_id, label, locs):
+    """
+    Write <stem>.<hash>.json and its .bin twin into out_dir. Returns the
+    manifest entry (file names, JSON hash and sizes) and whether the JSON
+    is new.
+    """
+    vocab, entries = encode_vocab(locs)
+    pack_data = {
+        "id":        pack_id,
+        "label":     label,
+        "vocab":     vocab,
+        "locations": entries,
+    }
+    data, binary = dump_json(pack_data), encode_binary(pack_id, label, locs)
+    name, bin_name = hashed_name(stem, ".json", data), hashed_name(stem, ".bin", binary)
+    changed = write_if_changed(os.path.join(out_dir, name), data)
+    write_if_changed(os.path.join(out_dir, bin_name), binary)
+    entry = {"file": name, "bin": bin_name, "hash": name.split(".")[-2],
+             "bytes": len(data), "bin_bytes": len(binary)}
+    return entry, changed
+
+def write_ndjson(out_dir, stem, locs):
+    """
+    Stream `locs` (any iterable) into <stem>.<hash>.ndjson, one compact
+    JSON location per line, hashing as it goes. Returns the manifest
+    entry and whether the file is new.
+    """
+    h, size = hashlib.sha256(), 0
+    tmp = os.path.join(out_dir, stem + ".ndjson.tmp")
+    with open(tmp, "wb") as f:
+        for loc in locs:
+            line = (json.dumps(loc, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+            h.update(line)
+            size += len(line)
+            f.write(line)
+    name = f"{stem}.{h.hexdigest()[:HASH_LEN]}.ndjson"
+    path = os.path.join(out_dir, name)
+    changed = not os.path.exists(path)
+    if changed:
+        os.replace(tmp, path)
+    else:
+        os.remove(tmp)
+    return {"ndjson": name, "hash": name.split(".")[-2], "bytes": size}, changed
+
+def remove_stale(out_dir, written):
+    """Drop pack files a previous build left behind (older hashes, fewer shards)."""
+    for old in os.listdir(out_dir):
+        if old not in written and old.endswith((".json", ".bin", ".ndjson")):
+            os.remove(os.path.join(out_dir, old))
+
+def write_shards(packs, shards_dir):
+    """
+    Split every pack into SHARD_SIZE-location shards. The game fetches
+    only the shards its sampled rounds fall in, and the "All" pack is the
+    concatenation of every regional pack's shards. Returns the shard
+    entries per pack and how many shards changed.
+    """
+    os.makedirs(shards_dir, exist_ok=True)
+    shards, written, changed = {}, set(), 0
+    for pack_key, locs in packs.items():
+        label = PACK_LABELS.get(pack_key, pack_key.title())
+        shards[pack_key] = []
+        for n, start in enumerate(range(0, len(locs), SHARD_SIZE)):
+            chunk = locs[start:start + SHARD_SIZE]
+            entry, new = write_pack(shards_dir, f"{pack_key}-{n}", f"{pack_key}-{n}", label, chunk)
+            changed += new
+            shards[pack_key].append({"file": "shards/" + entry["file"], "bin": "shards/" + entry["bin"],
+                                     "count": len(chunk), "hash": entry["hash"],
+                                     "bytes": entry["bytes"], "bin_bytes": entry["bin_bytes"]})
+            written.update((entry["file"], entry["bin"]))
+    remove_stale(shards_dir, written)
+    return shards, changed
+
+def write_label_tables(locations, labels_dir):
+    """data/labels/<lang>.json: {"lang", "labels": {location id: localized label}}."""
+    tables = {}
+    for loc in locations:
+        for lang, label in loc.get("labels", {}).items():
+            tables.setdefault(lang, {})[str(loc["id"])] = label
+    if not tables:
+        return
+    os.makedirs(labels_dir, exist_ok=True)
+    for lang, labels in sorted(tables.items()):
+        changed = write_if_changed(os.path.join(labels_dir, f"{lang}.json"),
+                                   dump_json({"lang": lang, "labels": labels}))
+        print(f"  🔤 labels/{lang}.json — {len(labels)} labels{'' if changed else ' (unchanged)'}")
+
+def write_precache(data_dir, manifest):
+    """data/precache.js: the files sw.js caches on install, versioned by their bytes."""
+    files = ["manifest.json"] + [s["bin"] for p in manifest["packs"] for s in p["shards"]]
+    files += [p["ndjson"] for p in manifest["packs"] if "ndjson" in p]
+    labels_dir = os.path.join(data_dir, "labels")
+    if os.path.isdir(labels_dir):
+        files += sorted("labels/" + f for f in os.listdir(labels_dir) if f.endswith(".json"))
+    h = hashlib.sha256()
+    for name in files:
+        with open(os.path.join(data_dir, name), "rb") as f:
+            h.update(name.encode("utf-8") + b"\0" + f.read())
+    precache = {"version": h.hexdigest()[:HASH_LEN], "files": files}
+    body = ("// Written by scripts/pack_writer.py: the files sw.js caches on install\n"
+            f"self.PRECACHE = {json.dumps(precache, indent=2)};\n")
+    changed = write_if_changed(os.path.join(data_dir, "precache.js"), body.encode("utf-8"))
+    print(f"  📴 precache.js — {len(files)} files, version {precache['version']}{'' if changed else ' (unchanged)'}")
+
+def add_output_arguments(ap):
+    ap.add_argument("--ndjson", action="store_true",
+                    help="also write each whole pack as streamed NDJSON (one location per line)")
+
+def write_outputs(locations, data_dir, ndjson=False):
+    os.makedirs(data_dir, exist_ok=True)
+    locations = assign_ids(locations, os.path.join(data_dir, "location_ids.json"))
+    packs = group_packs(locations)
+    write_label_tables(locations, os.path.join(data_dir, "labels"))
+
+    # Every pack, and "All", is served from the shards — no whole-pack copies
+    shards, n_changed = write_shards(packs, os.path.join(data_dir, "shards"))
+    manifest = {"version": MANIFEST_VERSION, "count": len(locations), "shard_size": SHARD_SIZE, "packs": []}
+    for pack_key, locs in packs.items():
+        manifest["packs"].append({"id": pack_key, "label": PACK_LABELS.get(pack_key, pack_key.title()),
+                                  "count": len(locs),
+                                  "bytes": sum(s["bytes"] for s in shards[pack_key]),
+                                  "bin_bytes": sum(s["bin_bytes"] for s in shards[pack_key]),
+                                  "shards": shards[pack_key]})
+        print(f"  📦 {pack_key} — {len(locs)} locations in {len(shards[pack_key])} shards")
+    n_shards = sum(map(len, shards.values()))
+    print(f"\n✅ shards/ — {len(locations)} total locations in {n_shards} shards ({n_changed} changed)")
+
+    packs_dir, written = os.path.join(data_dir, "packs"), set()
+    if ndjson:
+        os.makedirs(packs_dir, exist_ok=True)
+        for entry in manifest["packs"]:
+            locs = packs[entry["id"]]
+            order = random.Random(entry["id"]).sample(range(len(locs)), len(locs))
+            nd, changed = write_ndjson(packs_dir, entry["id"], (locs[i] for i in order))
+            written.add(nd["ndjson"])
+            entry.update(ndjson="packs/" + nd["ndjson"], ndjson_hash=nd["hash"], ndjson_bytes=nd["bytes"])
+            print(f"  📜 {nd['ndjson']} — {len(locs)} locations{'' if changed else ' (unchanged)'}")
+    if os.path.isdir(packs_dir):
+        remove_stale(packs_dir, written)
+
+    changed = write_if_changed(os.path.join(data_dir, "manifest.json"), dump_json(manifest))
+    print(f"  🧾 manifest.json — {len(packs)} packs{'' if changed else ' (unchanged)'}")
+    write_precache(data_dir, manifest)
+    for stale in ("locations.json", "locations.bin"):
+        path = os.path.join(data_dir, stale)
+        if os.path.exists(path):
+            os.remove(path)
+            print(f"  🗑  removed {stale} (superseded by shards/)")
+    return packs
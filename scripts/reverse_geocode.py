@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Offline reverse geocoding for the pack build.
+Country polygons come from a boundary GeoJSON (Natural Earth admin-0
+countries, 1:50m, public domain) kept gzipped in
+scripts/boundaries/countries.geojson.gz. A build downloads it there the
+first time it is missing (`python scripts/reverse_geocode.py
+--fetch-boundaries` does so on its own). Every polygon part is indexed by its bounding box in a static
+R-tree packed with Sort-Tile-Recursive, so a lookup only runs the
+even-odd point-in-polygon test on the few parts whose box holds the point.
+Points just off a generalised coastline (harbours, promenades) fall back
+to the nearest border within SNAP_KM.
+
+Each location gets "cc" and "continent", so the game reads its hints from
+the pack instead of guessing them from the coordinates. The country a
+location declares (GeoNames code or the flag in its label) is kept; when
+the polygons disagree the location is reported as a mismatch.
+"""
+import argparse, gzip, json, math, os, urllib.request
+
+from countries import CONTINENT, HINT_CONTINENT, flag_emoji, label_country
+from geonames_io import open_dump
+
+BOUNDARIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "boundaries", "countries.geojson.gz")
+BOUNDARIES_URL  = ("https://raw.githubusercontent.com/nvkelso/natural-earth-vector/master/"
+                   "geojson/ne_50m_admin_0_countries.geojson")
+CC_PROPERTIES   = ("ISO_A2_EH", "ISO_A2", "iso_a2_eh", "iso_a2")  # first usable one wins
+NODE_SIZE       = 16
+SNAP_KM         = 15
+KM_PER_DEG      = 111.32
+
+def _bbox(ring):
+    xs = [p[0] for p in ring]
+    ys = [p[1] for p in ring]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+def _union(boxes):
+    x0, y0, x1, y1 = zip(*boxes)
+    return (min(x0), min(y0), max(x1), max(y1))
+
+class STRTree:
+    """Read-only R-tree over (bbox, item) pairs, bulk-loaded bottom-up."""
+
+    def __init__(self, entries, node_size=NODE_SIZE):
+        level = list(entries)
+        while len(level) > node_size:
+            level = self._pack(level, node_size)
+        self.root = level
+
+    @staticmethod
+    def _pack(entries, node_size):
+        # Sort by x into vertical slices, each slice by y into full nodes
+        n_nodes  = math.ceil(len(entries) / node_size)
+        per_cut  = math.ceil(math.sqrt(n_nodes)) * node_size
+        entries  = sorted(entries, key=lambda e: e[0][0] + e[0][2])
+        parents  = []
+        for s in range(0, len(entries), per_cut):
+            cut = sorted(entries[s:s + per_cut], key=lambda e: e[0][1] + e[0][3])
+            for c in range(0, len(cut), node_size):
+                group = cut[c:c + node_size]
+                parents.append((_union(b for b, _ in group), group))
+        return parents
+
+    def query(self, x0, y0, x1, y1):
+        """Yield the items whose box intersects the query box."""
+        stack = [self.root]
+        while stack:
+            for box, child in stack.pop():
+                if box[0] <= x1 and box[2] >= x0 and box[1] <= y1 and box[3] >= y0:
+                    if isinstance(child, list):
+                        stack.append(child)
+                    else:
+                        yield child
+
+def _inside(x, y, rings):
+    # Even-odd rule over the outer ring and its holes
+    inside = False
+    for ring in rings:
+        px, py = ring[-1]
+        for qx, qy in ring:
+            if (qy > y) != (py > y) and x < px + (y - py) * (qx - px) / (qy - py):
+                inside = not inside
+            px, py = qx, qy
+    return inside
+
+def _edge_km(x, y, rings):
+    # Distance to the nearest edge, on a local equirectangular projection
+    kx = KM_PER_DEG * math.cos(math.radians(y))
+    best = math.inf
+    for ring in rings:
+        px, py = ring[-1]
+        for qx, qy in ring:
+            ax, ay = (px - x) * kx, (py - y) * KM_PER_DEG
+            dx, dy = (qx - px) * kx, (qy - py) * KM_PER_DEG
+            seg2 = dx * dx + dy * dy
+            t = 0.0 if seg2 == 0 else max(0.0, min(1.0, -(ax * dx + ay * dy) / seg2))
+            best = min(best, math.hypot(ax + t * dx, ay + t * dy))
+            px, py = qx, qy
+    return best
+
+def _feature_cc(props):
+    for key in CC_PROPERTIES:
+        cc = props.get(key)
+        if isinstance(cc, str) and len(cc) == 2 and cc.isalpha():
+            return cc.upper()
+    return None
+
+class CountryIndex:
+    def __init__(self, parts):
+        self.parts = parts          # [(cc, [ring, …]), …], rings as [(lng, lat), …]
+        self.tree  = STRTree((_bbox(rings[0]), i) for i, (_, rings) in enumerate(parts))
+
+    @classmethod
+    def load(cls, path=BOUNDARIES_FILE):
+        with open_dump(path) as f:
+            data = json.load(f)
+        parts = []
+        for feature in data["features"]:
+            cc, geom = _feature_cc(feature.get("properties") or {}), feature.get("geometry")
+            if cc is None or not geom:
+                continue
+            polys = [geom["coordinates"]] if geom["type"] == "Polygon" else geom["coordinates"]
+            for poly in polys:
+                parts.append((cc, [[tuple(p[:2]) for p in ring] for ring in poly]))
+        return cls(parts)
+
+    def lookup(self, lat, lng, snap_km=SNAP_KM):
+        """(cc, "inside" | "near") for a point, or (None, None) if it is far from land."""
+        for i in self.tree.query(lng, lat, lng, lat):
+            cc, rings = self.parts[i]
+            if _inside(lng, lat, rings):
+                return cc, "inside"
+        dy = snap_km / KM_PER_DEG
+        dx = dy / max(math.cos(math.radians(lat)), 0.01)
+        best, best_cc = snap_km, None
+        for i in self.tree.query(lng - dx, lat - dy, lng + dx, lat + dy):
+            cc, rings = self.parts[i]
+            d = _edge_km(lng, lat, rings)
+            if d <= best:
+                best, best_cc = d, cc
+        return (best_cc, "near") if best_cc else (None, None)
+
+def geocode(locations, index=None):
+    """
+    Return (locations with cc/continent, mismatches). A mismatch is
+    (location, declared cc, cc of the polygon it falls in).
+    """
+    out, mismatches = [], []
+    for loc in locations:
+        declared = loc.get("cc") or label_country(loc["label"])
+        found = index.lookup(loc["lat"], loc["lng"])[0] if index else None
+        if declared and found and declared != found:
+            mismatches.append((loc, declared, found))
+        cc = declared or found
+        out.append(dict(loc, cc=cc, continent=CONTINENT.get(cc) or HINT_CONTINENT.get(cc)))
+    return out, mismatches
+
+def add_geocode_arguments(ap):
+    ap.add_argument("--boundaries", default=BOUNDARIES_FILE, metavar="GEOJSON",
+                    help="country polygons used to check every location (default: %(default)s)")
+    ap.add_argument("--boundaries-url", default=BOUNDARIES_URL, metavar="URL",
+                    help="where to download the polygons from when --boundaries is missing")
+    ap.add_argument("--no-fetch-boundaries", action="store_true",
+                    help="never download missing boundaries; countries are then taken from labels unchecked")
+
+def geocode_locations(locations, args):
+    index = None
+    if not os.path.exists(args.boundaries) and not args.no_fetch_boundaries:
+        print(f"  ⬇️  Downloading country boundaries → {args.boundaries}")
+        try:
+            fetch_boundaries(args.boundaries, args.boundaries_url)
+        except (OSError, ValueError) as e:  # URLError is an OSError; ValueError covers bad JSON
+            print(f"  ⚠️  Could not download {args.boundaries_url}: {e}")
+    if os.path.exists(args.boundaries):
+        index = CountryIndex.load(args.boundaries)
+    else:
+        print(f"  ⚠️  {args.boundaries} not found — countries taken from labels, not checked "
+              f"(python scripts/reverse_geocode.py --fetch-boundaries)")
+    located, mismatches = geocode(locations, index)
+    for loc, declared, found in mismatches:
+        print(f"     ≠ {loc['label']} ({loc['lat']}, {loc['lng']}) lies in {found} {flag_emoji(found)}, not {declared}")
+    unknown = sum(1 for loc in located if not loc["continent"])
+    print(f"  🗺  {len(located)} locations geocoded, {len(mismatches)} mismatches, {unknown} without a continent")
+    return located
+
+def fetch_boundaries(path=BOUNDARIES_FILE, url=BOUNDARIES_URL):
+    """
+    Download the Natural Earth countries GeoJSON to `path` (gzipped if
+    the name ends in .gz). Returns how many countries it holds.
+    """
+    with urllib.request.urlopen(url, timeout=120) as res:
+        data = res.read()
+    n = sum(1 for f in json.loads(data)["features"] if _feature_cc(f.get("properties") or {}))
+    if n == 0:
+        raise ValueError(f"{url}: no features with a country code")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".tmp", "wb") as raw:
+        if path.lower().endswith(".gz"):
+            with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+                f.write(data)
+        else:
+            raw.write(data)
+    os.replace(path + ".tmp", path)
+    return n
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Country boundaries for the offline reverse geocoder")
+    ap.add_argument("--fetch-boundaries", action="store_true",
+                    help=f"download the Natural Earth 1:50m countries (default source: {BOUNDARIES_URL})")
+    ap.add_argument("--url", default=BOUNDARIES_URL, help="GeoJSON to download")
+    ap.add_argument("--boundaries", default=BOUNDARIES_FILE, metavar="GEOJSON",
+                    help="where the boundaries are stored (default: %(default)s)")
+    args = ap.parse_args(argv)
+    if not args.fetch_boundaries:
+        ap.print_help()
+        return
+    n = fetch_boundaries(args.boundaries, args.url)
+    print(f"🗺  {n} countries → {args.boundaries} ({os.path.getsize(args.boundaries) / 1e6:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
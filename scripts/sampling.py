@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+One-pass, population-weighted sampling without replacement
+(Efraimidis–Spirakis A-Res) with per-country caps.
+Every offered city gets the key log(u) / weight, u ~ U(0, 1); the sample
+is the cities with the largest keys. Each country keeps a bounded
+min-heap of its best `cap` keys, so memory is O(sum of caps) and each
+offer costs O(log cap) — the input can be a stream of any length.
+u is derived from the seed and the city's id rather than drawn in
+arrival order, so a country's reservoir depends on that country's rows
+alone: reservoirs can be cached and refilled one country at a time.
+"""
+import heapq, math
+
+# Weight = population ** WEIGHT_EXPONENT. 1.0 would make megacities near
+# certain picks; the square root keeps mid-sized towns in play.
+WEIGHT_EXPONENT = 0.5
+
+_MASK64 = (1 << 64) - 1
+
+def row_uniform(seed, uid):
+    """U(0, 1] draw fixed by (seed, uid) — splitmix64 of the pair."""
+    z = ((seed << 32) ^ uid) + 0x9E3779B97F4A7C15 & _MASK64
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9 & _MASK64
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EB & _MASK64
+    return ((z ^ (z >> 31)) >> 11) / (1 << 53) + 2.0 ** -53  # never 0
+
+class WeightedSampler:
+    def __init__(self, targets, caps, default_cap, seed, oversample=1):
+        self.targets     = targets
+        self.caps        = caps
+        self.default_cap = default_cap
+        self.oversample  = oversample   # keep extra per-country spares (e.g. for spacing rejects)
+        self.seed        = seed
+        self.heaps       = {}           # (continent, cc) -> min-heap of (key, uid, item)
+        # Why offered candidates were not picked; offered = picked + the rest
+        self.stats       = {"offered": 0, "country_cap": 0, "spacing": 0, "continent_target": 0}
+
+    def offer(self, item, continent, cc, pop, uid):
+        """Offer a city; `uid` (its geonameid) fixes its random key."""
+        if continent not in self.targets or pop <= 0:
+            return
+        key = math.log(row_uniform(self.seed, uid)) / (pop ** WEIGHT_EXPONENT)
+        self.stats["offered"] += 1
+        heap = self.heaps.get((continent, cc))
+        if heap is None:
+            heap = self.heaps[(continent, cc)] = []
+        size = self.caps.get(cc, self.default_cap) * self.oversample
+        entry = (key, uid, item)
+        if len(heap) < size:
+            heapq.heappush(heap, entry)
+            return
+        self.stats["country_cap"] += 1
+        if key > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+
+    def reservoirs(self, record):
+        """{cc: [(key, uid, record(item, continent)), …]} — plain data, e.g. to cache."""
+        return {cc: [(key, uid, record(item, cont)) for key, uid, item in heap]
+                for (cont, cc), heap in self.heaps.items()}
+
+    def restore(self, continent, cc, entries):
+        """Put back a reservoir saved by reservoirs()."""
+        heap = [tuple(e) for e in entries]
+        heapq.heapify(heap)
+        self.heaps[(continent, cc)] = heap
+
+    def sample(self, accept=None):
+        """
+        Yield (continent, item) for each continent in `targets` order, best key
+        first. `accept(item)` can veto candidates (e.g. a spacing rule); country
+        caps are re-applied so oversampled spares only fill vetoed slots.
+        """
+        for cont, target in self.targets.items():
+            pool = [e + (cc,) for (c, cc), heap in self.heaps.items() if c == cont for e in heap]
+            pool.sort(key=lambda e: (-e[0], e[1]))
+            counts, picked = {}, 0
+            for n, (key, _, item, cc) in enumerate(pool):
+                if picked >= target:
+                    self.stats["continent_target"] += len(pool) - n
+                    break
+                if counts.get(cc, 0) >= self.caps.get(cc, self.default_cap):
+                    self.stats["country_cap"] += 1
+                    continue
+                if accept is not None and not accept(item):
+                    self.stats["spacing"] += 1
+                    continue
+                counts[cc] = counts.get(cc, 0) + 1
+                picked += 1
+                yield cont, item
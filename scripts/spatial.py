@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Spatial helpers for the location build.
+Points live on the unit sphere as 3-D vectors and are bucketed in a
+uniform cube grid whose cell edge is the chord length of the search
+radius, so a radius query only ever looks at the 27 surrounding cells.
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0
+
+def unit_vector(lat, lng):
+    la, ln = math.radians(lat), math.radians(lng)
+    c = math.cos(la)
+    return (c * math.cos(ln), c * math.sin(ln), math.sin(la))
+
+def chord_for_km(km):
+    """Straight-line distance on the unit sphere for a great-circle distance."""
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+class SpatialGrid:
+    """Grid index answering "is anything within radius_km of this point?"."""
+
+    def __init__(self, radius_km):
+        self.radius_km = radius_km
+        self.chord2 = chord_for_km(radius_km) ** 2
+        self.cell = max(chord_for_km(radius_km), 1e-9)
+        self.cells = {}
+
+    def _key(self, v):
+        s = self.cell
+        return (math.floor(v[0] / s), math.floor(v[1] / s), math.floor(v[2] / s))
+
+    def add(self, lat, lng, item=None):
+        v = unit_vector(lat, lng)
+        self.cells.setdefault(self._key(v), []).append((v, item))
+
+    def neighbours(self, lat, lng):
+        """Yield (item, chord²) for every indexed point within the radius."""
+        v = unit_vector(lat, lng)
+        kx, ky, kz = self._key(v)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    for w, item in self.cells.get((kx + dx, ky + dy, kz + dz), ()):
+                        d2 = (v[0] - w[0]) ** 2 + (v[1] - w[1]) ** 2 + (v[2] - w[2]) ** 2
+                        if d2 <= self.chord2:
+                            yield item, d2
+
+    def has_neighbour(self, lat, lng):
+        return next(self.neighbours(lat, lng), None) is not None
+
+def near_duplicates(locations, radius_km, winners=()):
+    """
+    Split `locations` into (kept, dropped). A location is dropped when it
+    lies within radius_km of one of `winners` or of a location kept before
+    it; `dropped` holds (location, the one it duplicates). One grid lookup
+    per location, so O(n) expected.
+    """
+    grid = SpatialGrid(radius_km)
+    for loc in winners:
+        grid.add(loc["lat"], loc["lng"], loc)
+    kept, dropped = [], []
+    for loc in locations:
+        near = next(grid.neighbours(loc["lat"], loc["lng"]), None)
+        if near is not None:
+            dropped.append((loc, near[0]))
+            continue
+        grid.add(loc["lat"], loc["lng"], loc)
+        kept.append(loc)
+    return kept, dropped
+
+def print_duplicates(dropped, radius_km):
+    for loc, near in dropped:
+        print(f"     ✂ {loc['label']} ({loc['lat']}, {loc['lng']}) — within {radius_km:g} km of {near['label']}")
+    print(f"  🧹 {len(dropped)} near-duplicate locations dropped")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Build many pack variants (per school level, per lesson theme…) from one
+parse of the GeoNames dump. Each variant sets its own seed, TARGETS,
+caps, duplicate radius and output directory:
+
+    [
+      {"name": "primary", "seed": 1, "targets": {"EU": 200, "NA": 80},
+       "caps": {"ES": 40}, "default_cap": 3, "out_dir": "variants/primary"},
+      {"name": "secondary", "seed": 2, "out_dir": "variants/secondary"}
+    ]
+
+Keys left out ("dedup_km", "min_separation"…) fall back to the
+build_from_geonames.py constants, and "caps" entries are laid over
+CAP_COUNTRIES. The cities are loaded once (from the city database when
+it is current) and the variants run in a forked process pool, so the
+workers share the parent's arrays copy-on-write instead of each getting
+a copy. Where fork is not available, the variants run one after another.
+
+    python scripts/sweep.py variants.json --input /tmp/allCountries.zip --jobs 4
+"""
+import argparse, contextlib, io, json, multiprocessing, os, random, time
+from concurrent.futures import ProcessPoolExecutor
+
+import build_from_geonames as bfg
+from build_cache import BuildCache
+from build_report import BuildReport
+from city_db import CITY_DB_PATH
+from difficulty import add_difficulty
+from nearby_features import add_feature_arguments, apply_nearby_words, load_features
+from pack_writer import add_output_arguments, write_outputs
+from reverse_geocode import add_geocode_arguments, geocode_locations
+from spatial import near_duplicates
+
+# Set in the parent before the pool forks; workers read it, never pickle it
+_shared = {}
+
+def load_variants(path):
+    with open(path, encoding="utf-8") as f:
+        variants = json.load(f)
+    for n, v in enumerate(variants):
+        if "out_dir" not in v:
+            raise SystemExit(f"{path}: variant {n} has no out_dir")
+        v.setdefault("name", os.path.basename(os.path.normpath(v["out_dir"])))
+    return variants
+
+def build_variant(variant):
+    """Select, label and write one variant; returns its summary line."""
+    cities, manual, args = _shared["cities"], _shared["manual"], _shared["args"]
+    t0 = time.perf_counter()
+    seed = variant.get("seed", bfg.SEED)
+    caps = {**bfg.CAP_COUNTRIES, **variant.get("caps", {})}
+    min_sep = variant.get("min_separation", 0)
+    fixed = [(loc["lat"], loc["lng"]) for loc in manual]
+    with contextlib.redirect_stdout(io.StringIO()):
+        selected = bfg.select_balanced(cities, variant.get("targets", bfg.TARGETS), min_sep, fixed, seed,
+                                       caps=caps, default_cap=variant.get("default_cap", bfg.DEFAULT_CAP))
+        random.seed(seed)
+        locations = [bfg.build_location(c) for c in selected]
+        locations, dropped = near_duplicates(locations, variant.get("dedup_km", bfg.DEDUP_KM), manual)
+        random.shuffle(locations)
+        if _shared["features"] is not None:
+            apply_nearby_words(locations, _shared["features"], args.nearby_km)
+        all_locs = add_difficulty(geocode_locations(manual + locations, args))
+        packs = write_outputs(all_locs, variant["out_dir"], args.ndjson)
+    return {"name": variant["name"], "out_dir": variant["out_dir"], "seconds": time.perf_counter() - t0,
+            "selected": len(selected), "duplicates": len(dropped), "locations": len(all_locs), "packs": len(packs)}
+
+def run_variants(variants, jobs):
+    if jobs == 1 or "fork" not in multiprocessing.get_all_start_methods():
+        yield from map(build_variant, variants)
+        return
+    ctx = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count(), mp_context=ctx) as pool:
+        yield from pool.map(build_variant, variants)
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Build several pack variants from one parse of a GeoNames dump")
+    ap.add_argument("variants", help="JSON list of variants (seed, targets, caps, default_cap, out_dir)")
+    ap.add_argument("--input", default=bfg.GEONAMES_FILE,
+                    help="GeoNames dump: .txt, .zip, .gz or .bz2 (default: %(default)s)")
+    ap.add_argument("--data-dir", default=bfg.DATA_DIR,
+                    help="where locations_curated.json is read (default: %(default)s)")
+    ap.add_argument("--jobs", type=int, default=0,
+                    help="variants built at once (default: one per CPU)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="parse an uncompressed dump in N processes (0 = one per CPU)")
+    ap.add_argument("--city-db", default=CITY_DB_PATH, metavar="SQLITE",
+                    help="parse-once store of the dump's cities (default: %(default)s)")
+    ap.add_argument("--no-cache", action="store_true", help="re-read the dump even if the city database is current")
+    add_geocode_arguments(ap)
+    add_feature_arguments(ap)
+    add_output_arguments(ap)
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    variants = load_variants(args.variants)
+    report = BuildReport()
+    cache = BuildCache()
+    countries = set(bfg.CONTINENT) - bfg.LOW_COVERAGE
+    stats = {}
+    t0 = time.perf_counter()
+    store = bfg.stored_cities(args, countries, cache.file_hash(args.input), stats, report)
+    _shared.update(cities=bfg.filter_cities(store, stats), manual=bfg.load_curated(args.data_dir), args=args,
+                   features=load_features(args, cache))
+    cache.save()
+    del store
+    print(f"  Loaded {len(_shared['cities']):,} eligible cities in {time.perf_counter() - t0:.1f}s"
+          + (" from the city database" if stats.get("city_db") else ""))
+
+    print(f"▶ {len(variants)} variants")
+    t0 = time.perf_counter()
+    for r in run_variants(variants, args.jobs):
+        print(f"  ⏱  {r['name']:<20} {r['seconds']:7.2f}s  {r['selected']:>5} cities "
+              f"({r['duplicates']} duplicates), {r['locations']:>5} locations in {r['packs']} packs → {r['out_dir']}")
+    print(f"\n✅ {len(variants)} variants in {time.perf_counter() - t0:.1f}s")
+
+if __name__ == "__main__":
+    main()
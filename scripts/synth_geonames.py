@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic GeoNames dump, for benchmarks and offline builds.
+Writes the 19-column TSV layout of cities1000.txt / allCountries.txt —
+the same seed and row count always give the same bytes.
+Countries are drawn with roughly the shares they have in cities1000.txt,
+places cluster around a per-country centre, and populations follow a
+Pareto tail above 1,000 (about one place in ten reaches 10,000). A share
+of rows are unpopulated non-city features and a few are malformed, as in
+the real allCountries dump.
+
+    python scripts/synth_geonames.py 1M /tmp/synthetic.txt
+"""
+import argparse, gzip, random
+
+from countries import CONTINENT
+
+SEED = 1
+
+# Approximate share of rows per country in cities1000.txt; others get DEFAULT_SHARE
+COUNTRY_SHARE = {
+    "US": 120, "IN": 80, "MX": 60, "BR": 50, "DE": 60, "FR": 50, "IT": 50,
+    "ES": 35, "PH": 35, "CN": 30, "RU": 30, "JP": 15, "PL": 15, "GB": 20,
+    "NL": 10, "BE": 10, "AT": 10, "CH": 10, "PT": 10, "CO": 10, "AR": 10,
+    "ID": 15, "TR": 10, "UA": 15, "RO": 10, "CZ": 10, "SE": 8, "CA": 10,
+    "AU": 8, "ZA": 8, "NG": 6, "EG": 6, "PK": 8, "IR": 8, "VN": 8, "TH": 8,
+}
+DEFAULT_SHARE = 2
+UNKNOWN_COUNTRIES = ["AQ", "SJ", "GI", "IM", "JE"]   # not in CONTINENT, dropped by the build
+
+# (feature class, feature code, weight) — non-P rows carry no population
+FEATURES = [
+    ("P", "PPL", 600), ("P", "PPLA", 20), ("P", "PPLA2", 40), ("P", "PPLA3", 30),
+    ("P", "PPLX", 60), ("P", "PPLS", 15), ("P", "PPLR", 10), ("P", "PPLC", 1),
+    ("S", "CH", 40), ("S", "SCH", 40), ("S", "MUS", 5), ("S", "STNR", 10),
+    ("H", "STM", 60), ("H", "LK", 20), ("T", "MT", 30), ("T", "HLL", 20),
+    ("L", "PRK", 15), ("L", "AREA", 5),
+]
+MALFORMED_RATE = 0.0002
+NAME_POOL      = 50_000
+SYLLABLES = ["ka", "to", "ri", "san", "vel", "mar", "lo", "ben", "dor", "ha",
+             "ni", "que", "ville", "burg", "ão", "ñe", "sk", "ew", "ia", "tu"]
+
+def parse_count(text):
+    """'10k' → 10000, '12M' → 12000000, '2500' → 2500."""
+    text = text.strip()
+    scale = {"k": 1_000, "K": 1_000, "m": 1_000_000, "M": 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+def _country_table(rng):
+    codes = sorted(CONTINENT) + UNKNOWN_COUNTRIES
+    weights = [COUNTRY_SHARE.get(cc, DEFAULT_SHARE) for cc in codes]
+    centres = {cc: (rng.uniform(-50, 65), rng.uniform(-170, 170), rng.uniform(1, 8)) for cc in codes}
+    return codes, weights, centres
+
+def _name(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+def iter_rows(n_rows, seed=SEED, batch=10_000):
+    """Yield the dump as lists of TSV lines (str, newline-terminated)."""
+    rng = random.Random(seed)
+    codes, cweights, centres = _country_table(rng)
+    names = [_name(rng) for _ in range(NAME_POOL)]
+    alts = [",".join(rng.sample(names, k)) for k in (0, 0, 1, 2, 3) for _ in range(NAME_POOL // 5)]
+    fweights = [w for _, _, w in FEATURES]
+    rand, gauss, pareto = rng.random, rng.gauss, rng.paretovariate
+    for start in range(0, n_rows, batch):
+        size = min(batch, n_rows - start)
+        ccs = rng.choices(codes, cweights, k=size)
+        feats = rng.choices(FEATURES, fweights, k=size)
+        row_names = rng.choices(names, k=size)
+        row_alts = rng.choices(alts, k=size)
+        lines = []
+        for k in range(size):
+            cc, (fclass, fcode, _), name = ccs[k], feats[k], row_names[k]
+            lat0, lng0, spread = centres[cc]
+            lat = max(-89.9, min(89.9, gauss(lat0, spread)))
+            lng = (gauss(lng0, spread) + 180) % 360 - 180
+            pop = int(1000 * pareto(1.0)) if fclass == "P" else 0
+            lat_s = f"{lat:.5f}" if rand() >= MALFORMED_RATE else "N/A"
+            lines.append(f"{start + k + 1}\t{name}\t{name}\t{row_alts[k]}\t{lat_s}\t{lng:.5f}\t{fclass}\t{fcode}\t"
+                         f"{cc}\t\t{1 + (start + k) % 30:02d}\t\t\t\t{pop}\t\t\tEtc/UTC\t2024-01-01\n")
+        yield lines
+
+def write_dump(path, n_rows, seed=SEED):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8", newline="") as f:
+        for lines in iter_rows(n_rows, seed):
+            f.writelines(lines)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Write a synthetic GeoNames dump")
+    ap.add_argument("rows", type=parse_count, help="row count, e.g. 10k, 1M, 12M")
+    ap.add_argument("output", help="output path (.txt, or .gz to compress)")
+    ap.add_argument("--seed", type=int, default=SEED)
+    args = ap.parse_args(argv)
+    write_dump(args.output, args.rows, args.seed)
+    print(f"✅ {args.rows:,} rows → {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+// Service worker: offline cache for the app shell and the location packs.
+// data/precache.js (written by scripts/pack_writer.py on every build) lists
+// the files to cache and a version hashed from their contents; a new build
+// therefore installs a new cache in full before the old one is dropped.
+// Content-hashed files never change and are served straight from the cache.
+// The manifest and the precache list are network-first, so the page always
+// sees the deployed build (and the cache only when offline); everything else
+// is stale-while-revalidate. A new worker waits until no page uses the old
+// one: its cache is only deleted once nothing can still ask for those files.
+importScripts('data/precache.js');
+
+const CACHE_PREFIX = 'speakacademy-';
+const CACHE        = CACHE_PREFIX + self.PRECACHE.version;
+const SHELL        = ['./', 'index.html', 'config.js'];   // index.html needs config.js (the Maps key) to start
+const HASHED       = /\.[0-9a-f]{10}\.(json|bin|ndjson)$/;   // pack_writer.HASH_LEN hex digits
+const BUILD_FILES  = /\/data\/(manifest\.json|precache\.js)$/;
+
+self.addEventListener('install', event => {
+  event.waitUntil(caches.open(CACHE)
+    .then(cache => cache.addAll([...SHELL, ...self.PRECACHE.files.map(f => 'data/' + f)])));
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil(caches.keys()
+    .then(keys => Promise.all(keys
+      .filter(k => k.startsWith(CACHE_PREFIX) && k !== CACHE)
+      .map(k => caches.delete(k)))));
+});
+
+self.addEventListener('fetch', event => {
+  const url = new URL(event.request.url);
+  if (event.request.method !== 'GET' || url.origin !== self.location.origin) return;
+  if (HASHED.test(url.pathname)) event.respondWith(cacheFirst(event.request));
+  else if (BUILD_FILES.test(url.pathname)) event.respondWith(networkFirst(event.request));
+  else event.respondWith(staleWhileRevalidate(event));
+});
+
+async function cacheFirst(request) {
+  const cached = await caches.match(request);
+  if (cached) return cached;
+  const res = await fetch(request);
+  if (res.ok) (await caches.open(CACHE)).put(request, res.clone());
+  return res;
+}
+
+async function networkFirst(request) {
+  const cache = await caches.open(CACHE);
+  try {
+    const res = await fetch(request);
+    if (res.ok) cache.put(request, res.clone());
+    return res;
+  } catch (e) {
+    const cached = await cache.match(request);
+    if (cached) return cached;
+    throw e;
+  }
+}
+
+async function staleWhileRevalidate(event) {
+  const cache  = await caches.open(CACHE);
+  const cached = await cache.match(event.request);
+  const update = fetch(event.request).then(res => {
+    if (res.ok) cache.put(event.request, res.clone());
+    return res;
+  });
+  if (!cached) return update;
+  event.waitUntil(update.catch(() => { /* offline — the cached copy stands */ }));
+  return cached;
+}
@@ -0,0 +1,143 @@
+// Round loading in index.html against the shipped data/ and a mocked
+// google.maps: dead panoramas are skipped, no round shows a location whose
+// shard is not loaded, and a failed round is reported instead of thrown.
+//
+//     node --test tests
+import { test } from 'node:test';
+import assert from 'node:assert/strict';
+import fs from 'node:fs';
+import path from 'node:path';
+import { fileURLToPath } from 'node:url';
+
+const ROOT = path.dirname(path.dirname(fileURLToPath(import.meta.url)));
+const html = fs.readFileSync(path.join(ROOT, 'index.html'), 'utf8');
+const grab = (from, to) => {
+  const start = html.indexOf(from);
+  assert.ok(start >= 0, `index.html has no "${from}"`);
+  return html.slice(start, html.indexOf(to, start));
+};
+// Config through panorama loading, the skip/round loaders and the shard fetch
+const SOURCE = grab('// ── Config', '// ── Hints') + grab('// ── Skip Location', '// ── Cancel Guess')
+  + grab('// Binary shard first', 'function startGame');
+
+// data/ served from disk; failing = true turns every shard request into a 503
+let failing = false;
+globalThis.fetch = async url => {
+  const file = path.join(ROOT, url);
+  if ((failing && url.includes('/shards/')) || !fs.existsSync(file)) return { ok: false, status: failing ? 503 : 404 };
+  const buf = fs.readFileSync(file);
+  return {
+    ok: true,
+    json: async () => JSON.parse(buf.toString('utf8')),
+    arrayBuffer: async () => buf.buffer.slice(buf.byteOffset, buf.byteOffset + buf.byteLength),
+  };
+};
+globalThis.localStorage = { getItem: () => null, setItem() {} };
+
+// Street View answers ZERO_RESULTS for about a third of all points
+const lookups = { total: 0, dead: 0 };
+const isDead = loc => Math.floor(Math.abs(loc.lat) * 1e4) % 3 === 0;
+globalThis.google = { maps: {
+  StreetViewStatus: { OK: 'OK', ZERO_RESULTS: 'ZERO_RESULTS' },
+  StreetViewService: class {
+    getPanorama({ location }) {
+      lookups.total++;
+      return new Promise((resolve, reject) => setTimeout(() => {
+        if (!isDead(location)) return resolve({ data: { location: { pano: `pano@${location.lat}` } } });
+        lookups.dead++;
+        reject(Object.assign(new Error('no panorama'), { code: 'ZERO_RESULTS' }));
+      }, 2));
+    }
+  },
+  event: { clearListeners() {}, addListenerOnce() {} },
+}};
+
+const elements = new Map();
+globalThis.document = {
+  getElementById: id => {
+    if (!elements.has(id)) elements.set(id, { textContent: '', style: {}, classList: { add() {}, remove() {} } });
+    return elements.get(id);
+  },
+};
+
+function loadGame() {
+  return new Function(`
+    const clearHints = () => {}, updateScoreCards = () => {}, showTeamStart = () => {};
+    ${SOURCE};
+    panorama = { setPano() {}, setPosition() {}, setPov() {}, getStatus: () => 'OK' };
+    return {
+      loadManifest, packList, pickLocation, nextLocation, prefetch, roundTier, startRound,
+      get LOCATIONS() { return LOCATIONS; },
+      get teamLocs() { return teamLocs; },
+      setRound: r => { round = r; },
+      async setup(pack, plan = true) {
+        LOCATIONS  = new ShardedPack(pack.shards.map(s => ({ ...s })));
+        deck       = new Deck(LOCATIONS.length);
+        readyQueue = [];
+        prefetched = new Map();
+        if (plan) await planAhead(MAX_ROUNDS * 2 + ROUND_SPARE);
+      },
+    };
+  `)();
+}
+
+async function firstPack(game) {
+  failing = false;
+  const packs = game.packList(await game.loadManifest());
+  return packs.find(p => p.shards?.length > 1) ?? packs[0];
+}
+
+test('every round gets two looked-up locations of its tier', async () => {
+  const game = loadGame();
+  await game.setup(await firstPack(game));
+  lookups.total = lookups.dead = 0;
+  for (let round = 1; round <= 5; round++) {
+    const tier = game.roundTier(round);
+    const a = await game.nextLocation(tier);
+    const b = await game.nextLocation(a.tier ?? tier);
+    for (const loc of [a, b]) {
+      assert.ok(loc.pano, `round ${round}: ${loc.label} was shown without a panorama`);
+      assert.ok(!isDead(loc), `round ${round}: ${loc.label} has no coverage`);
+    }
+    assert.notEqual(a.id, b.id);
+    game.prefetch(game.roundTier(round + 1));
+  }
+  assert.ok(lookups.dead > 0, 'the mock never answered ZERO_RESULTS');
+});
+
+test('pickLocation loads the shard of a location dealt before planning', async () => {
+  const game = loadGame();
+  await game.setup(await firstPack(game), false);
+  for (let i = 0; i < 5; i++) {
+    const loc = await game.pickLocation(game.roundTier(1));
+    assert.ok(loc && Number.isFinite(loc.lat), 'pickLocation returned an unloaded location');
+  }
+});
+
+test('startRound shows progress, then the round', async () => {
+  const game = loadGame();
+  await game.setup(await firstPack(game));
+  game.setRound(1);
+  const pending = game.startRound();
+  assert.match(document.getElementById('phase-label').textContent, /Loading next round/);
+  await pending;
+  assert.match(document.getElementById('phase-label').textContent, /Study the location/);
+  assert.ok(game.teamLocs.every(loc => loc?.pano));
+});
+
+test('startRound reports a round that could not load', async () => {
+  const game = loadGame();
+  await game.setup(await firstPack(game), false);
+  failing = true;
+  const errors = [];
+  const consoleError = console.error;
+  console.error = (...args) => errors.push(args);
+  try {
+    await game.startRound();
+  } finally {
+    console.error = consoleError;
+    failing = false;
+  }
+  assert.match(document.getElementById('phase-label').textContent, /Could not load the round/);
+  assert.equal(errors.length, 1);
+});
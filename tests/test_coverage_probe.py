@@ -0,0 +1,72 @@
+"""
+check_coverage against a local stub of the Street View metadata endpoint:
+dead points are dropped, live ones snapped, and a second run is answered
+entirely from the SQLite cache.
+
+    python -m pytest tests
+"""
+import json, os, sys, tempfile, threading, unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+from coverage_probe import check_coverage  # noqa: E402
+
+SNAP = 0.0005   # how far the stub's panorama lies from the asked point
+
+class StubMetadata(BaseHTTPRequestHandler):
+    """OK (with a panorama SNAP° north) for points with an even whole-degree longitude, else ZERO_RESULTS."""
+    requests = 0
+
+    def do_GET(self):
+        StubMetadata.requests += 1
+        lat, lng = map(float, parse_qs(urlsplit(self.path).query)["location"][0].split(","))
+        if int(lng) % 2 == 0:
+            body = {"status": "OK", "location": {"lat": lat + SNAP, "lng": lng}}
+        else:
+            body = {"status": "ZERO_RESULTS"}
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+class CoverageProbeTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubMetadata)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.endpoint = f"http://127.0.0.1:{self.server.server_port}/metadata"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = os.path.join(self.tmp.name, "coverage.sqlite3")
+        StubMetadata.requests = 0
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def probe(self, locations):
+        return check_coverage(locations, self.endpoint, cache_path=self.cache, rate=1000)
+
+    def test_drops_dead_snaps_live_and_caches(self):
+        locations = [{"lat": 10.0 + i / 100, "lng": float(i), "label": f"L{i}"} for i in range(100)]
+        kept, dropped = self.probe(locations)
+        self.assertEqual(len(kept), 50)
+        self.assertEqual(len(dropped), 50)
+        self.assertTrue(all(int(loc["lng"]) % 2 == 1 for loc in dropped))
+        for loc in kept:
+            original = locations[int(loc["lng"])]
+            self.assertAlmostEqual(loc["lat"], round(original["lat"] + SNAP, 4))
+        self.assertEqual(StubMetadata.requests, 100)
+
+        # Second run: every answer comes from the cache
+        again = self.probe(locations)
+        self.assertEqual(StubMetadata.requests, 100)
+        self.assertEqual(again, (kept, dropped))
+
+if __name__ == "__main__":
+    unittest.main()
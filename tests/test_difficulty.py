@@ -0,0 +1,90 @@
+"""
+knn_stats and tiers_for against a brute-force haversine k-NN over a small
+point set (dense clusters, scattered points, remote islands, the poles and
+the antimeridian), also with tiny batch sizes so every widening and
+batching path runs.
+
+    python -m pytest tests
+"""
+import contextlib, io, os, sys, unittest
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+import difficulty  # noqa: E402
+from difficulty import K, DENSITY_KM, add_difficulty, haversine_km, knn_stats, tiers_for  # noqa: E402
+
+def point_set(seed=3):
+    rng = np.random.default_rng(seed)
+    parts = []
+    for lat, lng, spread, n in ((40.4, -3.7, 0.05, 120), (35.7, 139.7, 0.3, 80), (-33.9, 18.4, 1.5, 60)):
+        parts.append(np.column_stack([rng.normal(lat, spread, n), rng.normal(lng, spread, n)]))
+    parts.append(np.column_stack([rng.uniform(-60, 70, 150), rng.uniform(-180, 180, 150)]))
+    parts.append(np.column_stack([rng.uniform(-1, 1, 30), rng.choice([-1, 1], 30) * rng.uniform(179, 180, 30)]))
+    parts.append(np.array([[89.9, 0.0], [89.95, 120.0], [-89.9, 45.0], [-54.4, 3.4], [-37.1, -12.3], [-49.3, 69.2]]))
+    pts = np.concatenate(parts)
+    return pts[:, 0], pts[:, 1]
+
+def brute_force(lat, lng, k=K, density_km=DENSITY_KM):
+    d = haversine_km(lat[:, None], lng[:, None], lat[None, :], lng[None, :])
+    np.fill_diagonal(d, np.inf)
+    return np.sort(d, axis=1)[:, :k], (d <= density_km).sum(axis=1)
+
+class DifficultyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lat, cls.lng = point_set()
+        cls.knn, cls.density = brute_force(cls.lat, cls.lng)
+
+    def assert_matches_brute_force(self):
+        knn, density = knn_stats(self.lat, self.lng)
+        np.testing.assert_allclose(knn, self.knn, atol=1e-6)
+        np.testing.assert_array_equal(density, self.density)
+        np.testing.assert_array_equal(tiers_for(knn, density), tiers_for(self.knn, self.density))
+
+    def test_matches_brute_force(self):
+        self.assert_matches_brute_force()
+
+    def test_matches_brute_force_in_small_batches(self):
+        with mock.patch.object(difficulty, "MAX_PAIRS", 64), mock.patch.object(difficulty, "CHUNK", 7):
+            self.assert_matches_brute_force()
+
+    def test_matches_brute_force_past_the_widening(self):
+        # Most locations fall through to the whole-set dot-product pass
+        with mock.patch.object(difficulty, "KNN_MAX_KM", 40), mock.patch.object(difficulty, "CHUNK", 50):
+            self.assert_matches_brute_force()
+
+    def test_tiers_are_equal_thirds_by_isolation(self):
+        tier = tiers_for(self.knn, self.density)
+        counts = np.bincount(tier)
+        self.assertEqual(len(counts), 3)
+        self.assertLessEqual(counts.max() - counts.min(), 1)
+        isolation = self.knn.mean(axis=1)
+        self.assertLessEqual(isolation[tier == 0].max(), isolation[tier == 1].min())
+        self.assertLessEqual(isolation[tier == 1].max(), isolation[tier == 2].min())
+
+    def test_density_breaks_ties(self):
+        knn = np.ones((6, 2))
+        density = np.array([0, 5, 1, 4, 2, 3])
+        # Same isolation everywhere: the more neighbours, the easier
+        self.assertEqual(tiers_for(knn, density).tolist(), [2, 0, 2, 0, 1, 1])
+
+    def test_small_sets(self):
+        knn, density = knn_stats([10.0], [20.0])
+        self.assertEqual(knn.shape, (1, 0))
+        knn, density = knn_stats([0.0, 0.0, 0.0], [0.0, 1.0, 3.0])
+        np.testing.assert_allclose(knn, brute_force(np.zeros(3), np.array([0.0, 1.0, 3.0]), k=2)[0], atol=1e-6)
+
+    def test_tiers_cut_per_pack(self):
+        locations = [{"lat": float(la), "lng": float(ln), "pack": "europe" if i % 2 else "asia"}
+                     for i, (la, ln) in enumerate(zip(self.lat, self.lng))]
+        with contextlib.redirect_stdout(io.StringIO()):
+            tiered = add_difficulty(locations)
+        for pack in ("europe", "asia"):
+            rows = [i for i, loc in enumerate(locations) if loc["pack"] == pack]
+            want = tiers_for(self.knn[rows], self.density[rows]).tolist()
+            self.assertEqual([tiered[i]["tier"] for i in rows], want, pack)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+write_outputs on a small location list: the data directory is created
+when missing, and the manifest lists every location with the hash and
+sizes of the files it is served from. Every binary shard (.bin) decodes,
+with a reader that mirrors decodeBinaryPack in index.html, to the same
+locations as its JSON twin.
+
+    python -m pytest tests
+"""
+import contextlib, hashlib, io, json, os, re, struct, sys, tempfile, unittest
+from array import array
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+from pack_writer import BIN_MAGIC, BIN_VERSION, NO_TIER, write_outputs  # noqa: E402
+
+def sample_locations(n=40):
+    packs = ["europe", "asia"]
+    return [{"lat": 40.0 + i / 10, "lng": -3.0 + i / 7, "label": f"Place {i}, ES 🇪🇸", "cc": "ES",
+             "continent": "EU", "tier": i % 3, "words": ["plaza", "calle"] if i % 2 else ["río"],
+             "pack": packs[i % 2]}
+            for i in range(n)]
+
+def decode_binary_pack(buf):
+    """Python twin of decodeBinaryPack in index.html."""
+    magic, version, n, scale, n_strings, n_refs, n_bytes, id_ref, label_ref = struct.unpack_from("<4s8I", buf)
+    if magic != BIN_MAGIC or version != BIN_VERSION:
+        raise ValueError("Unsupported pack format")
+    off = 36
+
+    def view(typecode, length):
+        nonlocal off
+        a = array(typecode, buf[off:off + length * 4])
+        if sys.byteorder == "big":
+            a.byteswap()
+        off += length * 4
+        return a
+
+    lat, lng, ids = view("i", n), view("i", n), view("I", n)
+    label, cc, cont, tier = view("I", n), view("I", n), view("I", n), view("I", n)
+    starts, refs, str_off = view("I", n + 1), view("I", n_refs), view("I", n_strings + 1)
+    blob = buf[off:off + n_bytes]
+    if off + n_bytes + (-n_bytes % 4) != len(buf):
+        raise ValueError("trailing or missing bytes")
+    string = lambda i: blob[str_off[i]:str_off[i + 1]].decode("utf-8")
+    locations = []
+    for i in range(n):
+        loc = {"id": ids[i], "lat": lat[i] / scale, "lng": lng[i] / scale, "label": string(label[i]),
+               "cc": string(cc[i]), "continent": string(cont[i]),
+               "words": [string(r) for r in refs[starts[i]:starts[i + 1]]]}
+        if tier[i] != NO_TIER:
+            loc["tier"] = tier[i]
+        locations.append(loc)
+    return {"id": string(id_ref), "label": string(label_ref), "locations": locations}
+
+def json_pack_view(data):
+    """Python twin of jsonPackView in index.html (words looked up in the vocab)."""
+    return [{"id": loc["id"], "lat": loc["lat"], "lng": loc["lng"], "label": loc["label"],
+             "cc": loc.get("cc") or "", "continent": loc.get("continent") or "",
+             "words": data["vocab"][loc["w"]], **({"tier": loc["tier"]} if "tier" in loc else {})}
+            for loc in data["locations"]]
+
+def build(locations, data_dir, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        write_outputs(locations, data_dir, **kwargs)
+    with open(os.path.join(data_dir, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+class WriteOutputsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_creates_missing_data_dir(self):
+        data_dir = os.path.join(self.tmp.name, "new", "data")
+        manifest = build(sample_locations(), data_dir)
+        self.assertEqual(manifest["count"], 40)
+        self.assertEqual(sum(p["count"] for p in manifest["packs"]), 40)
+        for name in ("location_ids.json", "precache.js"):
+            self.assertTrue(os.path.exists(os.path.join(data_dir, name)), name)
+
+    def test_manifest_hashes_and_sizes(self):
+        data_dir = os.path.join(self.tmp.name, "data")
+        manifest = build(sample_locations(), data_dir, ndjson=True)
+        for pack in manifest["packs"]:
+            for shard in pack["shards"]:
+                with open(os.path.join(data_dir, shard["file"]), "rb") as f:
+                    data = f.read()
+                self.assertEqual(shard["bytes"], len(data))
+                self.assertEqual(shard["hash"], hashlib.sha256(data).hexdigest()[:len(shard["hash"])])
+                self.assertEqual(shard["bin_bytes"], os.path.getsize(os.path.join(data_dir, shard["bin"])))
+            self.assertEqual(pack["bytes"], sum(s["bytes"] for s in pack["shards"]))
+            self.assertEqual(pack["bin_bytes"], sum(s["bin_bytes"] for s in pack["shards"]))
+            self.assertEqual(pack["ndjson_bytes"], os.path.getsize(os.path.join(data_dir, pack["ndjson"])))
+
+class BinaryPackTest(unittest.TestCase):
+    def assert_round_trip(self, data_dir, manifest):
+        for pack in manifest["packs"]:
+            for shard in pack["shards"]:
+                with open(os.path.join(data_dir, shard["file"]), encoding="utf-8") as f:
+                    data = json.load(f)
+                with open(os.path.join(data_dir, shard["bin"]), "rb") as f:
+                    binary = decode_binary_pack(f.read())
+                self.assertEqual((binary["id"], binary["label"]), (data["id"], data["label"]))
+                self.assertEqual(len(binary["locations"]), shard["count"])
+                for got, want in zip(binary["locations"], json_pack_view(data), strict=True):
+                    self.assertAlmostEqual(got.pop("lat"), want.pop("lat"), places=4)
+                    self.assertAlmostEqual(got.pop("lng"), want.pop("lng"), places=4)
+                    self.assertEqual(got, want)
+
+    def test_round_trip(self):
+        locations = sample_locations(70)
+        locations[3].pop("tier")
+        locations[4].update(cc=None, continent=None, words=[])
+        locations[5].update(label="Łódź, Polska 🇵🇱", words=["ulica", "tramwaj", "ulica"], lat=-89.9999, lng=179.9999)
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = os.path.join(tmp, "data")
+            self.assert_round_trip(data_dir, build(locations, data_dir))
+
+    def test_shipped_shards(self):
+        data_dir = os.path.join(ROOT, "data")
+        with open(os.path.join(data_dir, "manifest.json"), encoding="utf-8") as f:
+            self.assert_round_trip(data_dir, json.load(f))
+
+    def test_client_reads_this_version(self):
+        with open(os.path.join(ROOT, "index.html"), encoding="utf-8") as f:
+            html = f.read()
+        self.assertEqual(int(re.search(r"const BIN_VERSION = (\d+);", html).group(1)), BIN_VERSION)
+        self.assertEqual(int(re.search(r"const BIN_MAGIC\s*= (0x[0-9a-f]+);", html).group(1), 16),
+                         struct.unpack("<I", BIN_MAGIC)[0])
+
+if __name__ == "__main__":
+    unittest.main()
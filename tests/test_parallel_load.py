@@ -0,0 +1,83 @@
+"""
+load_parallel against the serial reader on a synth_geonames.py dump: with
+a tiny read chunk and many byte ranges, rows straddle chunk and range
+boundaries, and the CityStore columns and reject counts must still come
+out identical.
+
+    python -m pytest tests
+"""
+import os, sys, tempfile, unittest
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+import geonames_io  # noqa: E402
+from city_store import CityStore, load_parallel  # noqa: E402
+from countries import CONTINENT  # noqa: E402
+from geonames_io import byte_ranges, iter_lines, iter_range_lines, parse_rows  # noqa: E402
+from synth_geonames import write_dump  # noqa: E402
+
+ROWS    = 4000
+MIN_POP = 500
+CHUNK   = 333     # bytes, well under one synthetic row
+
+def columns(store):
+    return {
+        "gid": store.gid, "lat": store.lat, "lng": store.lng, "pop": store.pop,
+        "cc": np.array([store.countries[i] for i in store.cc]),
+        "feat": np.array([store.feats[i] for i in store.feat]),
+        "name": np.array([store.name(i) for i in range(len(store))]),
+    }
+
+class ParallelLoadTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.dump = os.path.join(cls.tmp.name, "synthetic.txt")
+        write_dump(cls.dump, ROWS)
+        cls.countries = set(CONTINENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def serial(self, path):
+        stats = {}
+        return CityStore.from_rows(parse_rows(iter_lines(path), self.countries, MIN_POP, stats)), stats
+
+    def assert_same_store(self, got, want):
+        got, want = columns(got), columns(want)
+        for name in want:
+            np.testing.assert_array_equal(got[name], want[name], err_msg=name)
+
+    def test_ranges_cover_every_line_once(self):
+        with open(self.dump, "rb") as f:
+            lines = f.read().split(b"\n")[:-1]
+        with mock.patch.object(geonames_io, "CHUNK_SIZE", CHUNK):
+            for parts in (1, 7, 64):
+                ranges = byte_ranges(self.dump, parts)
+                joined = [line for a, b in ranges for line in iter_range_lines(self.dump, a, b)]
+                self.assertEqual(joined, lines, parts)
+
+    def test_parallel_matches_serial(self):
+        want, want_stats = self.serial(self.dump)
+        self.assertGreater(len(want), 0)
+        with mock.patch.object(geonames_io, "CHUNK_SIZE", CHUNK):
+            for workers in (2, 3, 5):
+                stats = {}
+                got = load_parallel(self.dump, self.countries, MIN_POP, workers=workers, stats=stats)
+                self.assert_same_store(got, want)
+                self.assertEqual(stats, want_stats, workers)
+
+    def test_last_line_without_newline(self):
+        path = os.path.join(self.tmp.name, "no-newline.txt")
+        with open(self.dump, "rb") as src, open(path, "wb") as dst:
+            dst.write(src.read().rstrip(b"\n"))
+        want, _ = self.serial(path)
+        with mock.patch.object(geonames_io, "CHUNK_SIZE", CHUNK):
+            got = load_parallel(path, self.countries, MIN_POP, workers=3)
+        self.assert_same_store(got, want)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+CountryIndex and geocode against tests/fixtures/countries.geojson: a few
+box-shaped countries (one with a hole holding another country, one split
+over two polygons), lookups inside, near and far from them, mismatch
+reporting, and the build downloading a missing boundaries file.
+
+    python -m pytest tests
+"""
+import argparse, contextlib, gzip, io, os, random, shutil, sys, tempfile, threading, unittest
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from functools import partial
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS), "scripts"))
+from reverse_geocode import CountryIndex, _inside, geocode, geocode_locations  # noqa: E402
+
+FIXTURE = os.path.join(TESTS, "fixtures", "countries.geojson")
+
+class Quiet(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+class CountryIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.index = CountryIndex.load(FIXTURE)
+
+    def test_lookup(self):
+        cases = {
+            (40.0, -5.0):   ("ES", "inside"),
+            (48.0, 3.0):    ("FR", "inside"),   # ISO_A2_EH is -99, ISO_A2 is used
+            (46.0, 2.0):    ("CH", "inside"),   # in France's hole
+            (32.8, -17.0):  ("PT", "inside"),   # second polygon of a MultiPolygon
+            (45.1, 1.5):    ("FR", "near"),     # in the hole, 11 km from France's edge
+            (36.95, -5.0):  ("ES", "near"),     # just off the coast
+            (30.0, -30.0):  (None, None),       # open sea
+            (20.5, 20.5):   (None, None),       # polygon without a country code
+        }
+        for (lat, lng), expected in cases.items():
+            self.assertEqual(self.index.lookup(lat, lng), expected, (lat, lng))
+
+    def test_loads_gzip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "countries.geojson.gz")
+            with open(FIXTURE, "rb") as src, gzip.open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            self.assertEqual(CountryIndex.load(path).lookup(48.0, 3.0), ("FR", "inside"))
+
+    def test_tree_matches_brute_force(self):
+        # Enough parts for a multi-level tree; every lookup agrees with a scan
+        parts = [(f"{chr(65 + i // 26)}{chr(65 + i % 26)}", [[(x, y), (x + 0.9, y), (x + 0.9, y + 0.9), (x, y + 0.9)]])
+                 for i, (x, y) in enumerate((x, y) for x in range(20) for y in range(20))]
+        index, rng = CountryIndex(parts), random.Random(5)
+        for _ in range(500):
+            lat, lng = rng.uniform(-1, 21), rng.uniform(-1, 21)
+            brute = next((cc for cc, rings in parts if _inside(lng, lat, rings)), None)
+            found = index.lookup(lat, lng, snap_km=0)[0]
+            self.assertEqual(found, brute, (lat, lng))
+
+    def test_geocode_reports_mismatches(self):
+        locations = [
+            {"lat": 48.0, "lng": 3.0, "label": "Somewhere, Spain 🇪🇸"},   # flag says ES, polygon FR
+            {"lat": 40.0, "lng": -5.0, "label": "Madrid, Spain 🇪🇸"},
+            {"lat": 46.0, "lng": 2.0, "label": "Unlabelled"},
+            {"lat": 47.0, "lng": 5.0, "label": "Somewhere", "cc": "DE"},  # GeoNames code wins over the flag
+        ]
+        located, mismatches = geocode(locations, self.index)
+        self.assertEqual([(loc["label"], declared, found) for loc, declared, found in mismatches],
+                         [("Somewhere, Spain 🇪🇸", "ES", "FR"), ("Somewhere", "DE", "FR")])
+        self.assertEqual([(loc["cc"], loc["continent"]) for loc in located],
+                         [("ES", "EU"), ("ES", "EU"), ("CH", "EU"), ("DE", "EU")])
+
+class FetchBoundariesTest(unittest.TestCase):
+    def setUp(self):
+        handler = partial(Quiet, directory=os.path.dirname(FIXTURE))
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_port}/"
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def run_geocode(self, url, path):
+        args = argparse.Namespace(boundaries=path, boundaries_url=url, no_fetch_boundaries=False)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            located = geocode_locations([{"lat": 48.0, "lng": 3.0, "label": "Somewhere, Spain 🇪🇸"}], args)
+        return located, out.getvalue()
+
+    def test_downloads_missing_boundaries(self):
+        path = os.path.join(self.tmp.name, "boundaries", "countries.geojson.gz")
+        located, out = self.run_geocode(self.base + "countries.geojson", path)
+        self.assertTrue(os.path.exists(path))
+        with gzip.open(path) as f:
+            self.assertIn(b"FeatureCollection", f.read())
+        self.assertIn("1 mismatches", out)
+        self.assertEqual(located[0]["cc"], "ES")
+
+    def test_failed_download_leaves_countries_unchecked(self):
+        path = os.path.join(self.tmp.name, "countries.geojson.gz")
+        located, out = self.run_geocode(self.base + "missing.geojson", path)
+        self.assertFalse(os.path.exists(path))
+        self.assertIn("Could not download", out)
+        self.assertIn("0 mismatches", out)
+        self.assertEqual(located[0]["cc"], "ES")
+
+if __name__ == "__main__":
+    unittest.main()
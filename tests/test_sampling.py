@@ -0,0 +1,88 @@
+"""
+WeightedSampler: country caps and continent targets hold (also with
+oversampled spares and a vetoing accept rule), a seed fixes the selection
+whatever the offer order, saved reservoirs restore it, and picks follow
+population ** WEIGHT_EXPONENT.
+
+    python -m pytest tests
+"""
+import os, random, sys, unittest
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+from sampling import WEIGHT_EXPONENT, WeightedSampler  # noqa: E402
+
+TARGETS = {"EU": 40, "AF": 15}
+CAPS    = {"ES": 3, "FR": 8, "NG": 1}
+DEFAULT_CAP = 5
+
+def cities(n=3000, seed=1):
+    rng = random.Random(seed)
+    countries = [("EU", "ES"), ("EU", "FR"), ("EU", "DE"), ("EU", "IT"), ("AF", "NG"), ("AF", "KE"), ("AS", "JP")]
+    return [(uid, *rng.choice(countries), int(1000 * rng.paretovariate(1.0))) for uid in range(1, n + 1)]
+
+def run(rows, seed=7, oversample=1, accept=None):
+    sampler = WeightedSampler(TARGETS, CAPS, DEFAULT_CAP, seed, oversample)
+    for uid, cont, cc, pop in rows:
+        sampler.offer((uid, cc), cont, cc, pop, uid)
+    return sampler, list(sampler.sample(accept))
+
+class WeightedSamplerTest(unittest.TestCase):
+    def assert_within_limits(self, picked):
+        per_country = Counter(cc for _, (_, cc) in picked)
+        for cc, n in per_country.items():
+            self.assertLessEqual(n, CAPS.get(cc, DEFAULT_CAP), cc)
+        per_continent = Counter(cont for cont, _ in picked)
+        for cont, n in per_continent.items():
+            self.assertLessEqual(n, TARGETS[cont], cont)
+        self.assertNotIn("AS", per_continent)
+
+    def test_caps_and_targets(self):
+        _, picked = run(cities())
+        self.assert_within_limits(picked)
+        # EU caps sum to 21 < 40, AF to 6 < 15: every country fills its cap
+        self.assertEqual(Counter(cc for _, (_, cc) in picked),
+                         {"ES": 3, "FR": 8, "DE": 5, "IT": 5, "NG": 1, "KE": 5})
+
+    def test_caps_hold_with_spares_and_vetoes(self):
+        veto = lambda item: item[0] % 3 != 0
+        _, picked = run(cities(), oversample=4, accept=veto)
+        self.assert_within_limits(picked)
+        self.assertTrue(all(veto(item) for _, item in picked))
+        # Spares refill vetoed slots, so countries still reach their caps
+        self.assertEqual(Counter(cc for _, (_, cc) in picked)["FR"], 8)
+
+    def test_seed_fixes_selection(self):
+        rows = cities()
+        _, first = run(rows)
+        shuffled = rows[:]
+        random.Random(3).shuffle(shuffled)
+        _, again = run(shuffled)
+        self.assertEqual(sorted(first), sorted(again))
+        _, other = run(rows, seed=8)
+        self.assertNotEqual(sorted(first), sorted(other))
+
+    def test_restored_reservoirs_give_same_sample(self):
+        sampler, picked = run(cities())
+        saved = sampler.reservoirs(lambda item, cont: list(item))
+        restored = WeightedSampler(TARGETS, CAPS, DEFAULT_CAP, 7)
+        continent = {cc: cont for (cont, cc) in sampler.heaps}
+        for cc, entries in saved.items():
+            restored.restore(continent[cc], cc, entries)
+        self.assertEqual([(cont, tuple(item)) for cont, item in restored.sample()], picked)
+
+    def test_picks_follow_population_weight(self):
+        # One slot, four cities: A-Res picks each with probability weight / total
+        pops = {1: 100, 2: 400, 3: 900, 4: 1600}
+        weights = {uid: pop ** WEIGHT_EXPONENT for uid, pop in pops.items()}
+        total, trials, wins = sum(weights.values()), 4000, Counter()
+        for seed in range(trials):
+            sampler = WeightedSampler({"EU": 1}, {}, 1, seed)
+            for uid, pop in pops.items():
+                sampler.offer(uid, "EU", "ES", pop, uid)
+            wins.update(item for _, item in sampler.sample())
+        for uid, w in weights.items():
+            self.assertAlmostEqual(wins[uid] / trials, w / total, delta=0.03, msg=uid)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+near_duplicates as the build's merge stage calls it: curated locations
+(the winners) always beat generated points within the radius, points just
+past the radius are both kept, and pairs whose unit vectors fall in
+different grid cells (across the equator, the antimeridian, the ±90°
+meridians) are still found. SpatialGrid is also checked against a
+brute-force haversine scan.
+
+    python -m pytest tests
+"""
+import math, os, random, sys, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+from build_from_geonames import DEDUP_KM  # noqa: E402
+from spatial import EARTH_RADIUS_KM, SpatialGrid, near_duplicates, unit_vector  # noqa: E402
+
+KM_PER_DEG = math.pi * EARTH_RADIUS_KM / 180
+
+def haversine_km(a, b):
+    la1, ln1, la2, ln2 = map(math.radians, (a["lat"], a["lng"], b["lat"], b["lng"]))
+    h = math.sin((la2 - la1) / 2) ** 2 + math.cos(la1) * math.cos(la2) * math.sin((ln2 - ln1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+def loc(label, lat, lng):
+    return {"label": label, "lat": lat, "lng": lng}
+
+def pair_across(lat, lng, km, bearing="ns"):
+    """Two points `km` apart centred on (lat, lng), north-south or east-west."""
+    if bearing == "ns":
+        d = km / KM_PER_DEG / 2
+        return loc("a", lat - d, lng), loc("b", lat + d, lng)
+    d = km / (KM_PER_DEG * math.cos(math.radians(lat))) / 2
+    return loc("a", lat, (lng - d + 180) % 360 - 180), loc("b", lat, (lng + d + 180) % 360 - 180)
+
+# Centres whose pairs straddle a grid cell boundary of the unit-vector cube
+EDGES = {
+    "equator":     (0.0, 37.0, "ns"),
+    "antimeridian": (12.0, 180.0, "ew"),
+    "meridian 90E": (-30.0, 90.0, "ew"),
+    "meridian 90W": (45.0, -90.0, "ew"),
+    "equator at antimeridian": (0.0, 180.0, "ns"),
+}
+
+class NearDuplicatesTest(unittest.TestCase):
+    def test_curated_wins(self):
+        curated = loc("Plaza Mayor, Madrid 🇪🇸", 40.4155, -3.7074)
+        near = loc("Madrid (generated)", 40.4155 + 0.5 * DEDUP_KM / KM_PER_DEG, -3.7074)
+        far = loc("Toledo (generated)", 39.8628, -4.0273)
+        kept, dropped = near_duplicates([near, far], DEDUP_KM, [curated])
+        self.assertEqual(kept, [far])
+        self.assertEqual(dropped, [(near, curated)])
+
+    def test_first_generated_wins(self):
+        a, b = pair_across(51.5, -0.12, 0.5 * DEDUP_KM)
+        kept, dropped = near_duplicates([a, b], DEDUP_KM)
+        self.assertEqual(kept, [a])
+        self.assertEqual(dropped, [(b, a)])
+
+    def test_threshold(self):
+        for radius in (DEDUP_KM, 0.1):
+            inside = pair_across(-33.9, 18.4, radius * 0.999)
+            outside = pair_across(-33.9, 18.4, radius * 1.001)
+            self.assertEqual(len(near_duplicates(list(inside), radius)[1]), 1, radius)
+            self.assertEqual(len(near_duplicates(list(outside), radius)[1]), 0, radius)
+
+    def test_across_cell_edges(self):
+        for name, (lat, lng, bearing) in EDGES.items():
+            a, b = pair_across(lat, lng, 0.999 * DEDUP_KM, bearing)
+            cell = SpatialGrid(DEDUP_KM)._key
+            self.assertNotEqual(cell(unit_vector(a["lat"], a["lng"])), cell(unit_vector(b["lat"], b["lng"])),
+                                f"{name}: pair does not straddle a cell edge")
+            kept, dropped = near_duplicates([b], DEDUP_KM, [a])
+            self.assertEqual((kept, dropped), ([], [(b, a)]), name)
+            a, b = pair_across(lat, lng, 1.001 * DEDUP_KM, bearing)
+            self.assertEqual(near_duplicates([a, b], DEDUP_KM)[0], [a, b], name)
+
+    def test_grid_matches_brute_force(self):
+        rng, radius = random.Random(11), 25.0
+        points = [loc(str(i), rng.uniform(-2, 2), rng.choice((-1, 1)) * rng.uniform(178, 180)) for i in range(400)]
+        points += [loc(f"p{i}", rng.uniform(88, 90), rng.uniform(-180, 180)) for i in range(200)]
+        grid = SpatialGrid(radius)
+        for p in points:
+            grid.add(p["lat"], p["lng"], p["label"])
+        for q in points[::7]:
+            found = {label for label, _ in grid.neighbours(q["lat"], q["lng"])}
+            brute = {p["label"] for p in points if haversine_km(p, q) <= radius * (1 - 1e-9)}
+            self.assertTrue(brute <= found, q)
+            self.assertTrue(all(haversine_km(p, q) <= radius * (1 + 1e-9) for p in points if p["label"] in found), q)
+
+if __name__ == "__main__":
+    unittest.main()